@@ -0,0 +1,49 @@
+"""composite session date indexes
+
+Revision ID: 20261015_0003
+Revises: 20241214_0002
+Create Date: 2026-10-15 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "20261015_0003"
+down_revision: Union[str, None] = "20241214_0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids locking the session tables against writes while the
+    # indexes build, but it cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_sessions_done_athlete_date",
+            "training_sessions_done",
+            ["athlete_id", "date"],
+            postgresql_include=["actual_distance", "actual_rpe"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_sessions_planned_plan_date",
+            "training_sessions_planned",
+            ["plan_id", "date"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_sessions_planned_plan_date",
+            table_name="training_sessions_planned",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_sessions_done_athlete_date",
+            table_name="training_sessions_done",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,69 @@
+"""store enum columns as single-character codes
+
+Revision ID: 20261015_0004
+Revises: 20261015_0003
+Create Date: 2026-10-15 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261015_0004"
+down_revision: Union[str, None] = "20261015_0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLE_CODES = {"ATHLETE": "A", "COACH": "C"}
+SESSION_TYPE_CODES = {
+    "RODAJE": "R",
+    "PASADAS": "P",
+    "FARTLEK": "F",
+    "CUESTAS": "U",
+    "FUERZA": "Z",
+    "TECNICA": "T",
+    "COMPETENCIA": "X",
+    "DESCANSO": "D",
+}
+INVITE_STATUS_CODES = {"PENDING": "P", "ACCEPTED": "A", "DECLINED": "D"}
+
+COLUMNS = (
+    ("users", "role", ROLE_CODES),
+    ("training_sessions_planned", "type", SESSION_TYPE_CODES),
+    ("coach_invites", "status", INVITE_STATUS_CODES),
+)
+
+
+def _remap(table: str, column: str, mapping: dict[str, str]) -> None:
+    whens = " ".join(f"WHEN '{old}' THEN '{new}'" for old, new in mapping.items())
+    op.execute(f"UPDATE {table} SET {column} = CASE {column} {whens} END")
+
+
+def upgrade() -> None:
+    op.alter_column("coach_invites", "status", server_default=None)
+    for table, column, codes in COLUMNS:
+        _remap(table, column, codes)
+        op.alter_column(
+            table,
+            column,
+            type_=sa.CHAR(1),
+            existing_type=sa.String(length=20),
+            existing_nullable=False,
+        )
+    op.alter_column("coach_invites", "status", server_default="P")
+
+
+def downgrade() -> None:
+    op.alter_column("coach_invites", "status", server_default=None)
+    for table, column, codes in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.String(length=20),
+            existing_type=sa.CHAR(1),
+            existing_nullable=False,
+        )
+        _remap(table, column, {code: name for name, code in codes.items()})
+    op.alter_column("coach_invites", "status", server_default="PENDING")
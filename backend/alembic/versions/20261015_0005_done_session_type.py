@@ -0,0 +1,36 @@
+"""denormalize session type onto completed sessions
+
+Revision ID: 20261015_0005
+Revises: 20261015_0004
+Create Date: 2026-10-15 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261015_0005"
+down_revision: Union[str, None] = "20261015_0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("training_sessions_done", sa.Column("session_type", sa.CHAR(1), nullable=True))
+    op.execute(
+        """
+        UPDATE training_sessions_done
+        SET session_type = (
+            SELECT training_sessions_planned.type
+            FROM training_sessions_planned
+            WHERE training_sessions_planned.id = training_sessions_done.planned_session_id
+        )
+        WHERE planned_session_id IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("training_sessions_done", "session_type")
@@ -0,0 +1,38 @@
+"""unique pending invite per coach and email
+
+Revision ID: 20261015_0006
+Revises: 20261015_0005
+Create Date: 2026-10-15 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261015_0006"
+down_revision: Union[str, None] = "20261015_0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_coach_invites_pending_email",
+            "coach_invites",
+            ["coach_id", "athlete_email"],
+            unique=True,
+            postgresql_where=sa.text("status = 'P'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ux_coach_invites_pending_email",
+            table_name="coach_invites",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,46 @@
+"""coach invite listing indexes
+
+Revision ID: 20261015_0007
+Revises: 20261015_0006
+Create Date: 2026-10-15 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "20261015_0007"
+down_revision: Union[str, None] = "20261015_0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_coach_invites_coach_created",
+            "coach_invites",
+            ["coach_id", "created_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_coach_invites_athlete_created",
+            "coach_invites",
+            ["athlete_id", "created_at"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_coach_invites_athlete_created",
+            table_name="coach_invites",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_coach_invites_coach_created",
+            table_name="coach_invites",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,51 @@
+"""unique completed sessions per plan slot and manual day
+
+Revision ID: 20261015_0008
+Revises: 20261015_0007
+Create Date: 2026-10-15 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261015_0008"
+down_revision: Union[str, None] = "20261015_0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_sessions_done_athlete_planned",
+            "training_sessions_done",
+            ["athlete_id", "planned_session_id"],
+            unique=True,
+            postgresql_where=sa.text("planned_session_id IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ux_sessions_done_athlete_manual_date",
+            "training_sessions_done",
+            ["athlete_id", "date"],
+            unique=True,
+            postgresql_where=sa.text("planned_session_id IS NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ux_sessions_done_athlete_manual_date",
+            table_name="training_sessions_done",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ux_sessions_done_athlete_planned",
+            table_name="training_sessions_done",
+            postgresql_concurrently=True,
+        )
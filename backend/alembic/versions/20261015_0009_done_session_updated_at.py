@@ -0,0 +1,36 @@
+"""track completed session updates
+
+Revision ID: 20261015_0009
+Revises: 20261015_0008
+Create Date: 2026-10-15 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261015_0009"
+down_revision: Union[str, None] = "20261015_0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # now() is stable, so PostgreSQL stores it as the column's missing value
+    # instead of rewriting the table.
+    op.add_column(
+        "training_sessions_done",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.alter_column("training_sessions_done", "updated_at", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("training_sessions_done", "updated_at")
@@ -1,29 +1,28 @@
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 from typing import Any, Dict
 
+import bcrypt
+import jwt
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
-from passlib.context import CryptContext
 
 from .config import get_settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=get_settings().bcrypt_rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
 def create_access_token(subject: Dict[str, Any], expires_delta: timedelta | None = None) -> str:
     settings = get_settings()
     to_encode = subject.copy()
-    expire = datetime.utcnow() + (
-        expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
-    )
-    to_encode.update({"exp": expire})
+    lifetime = expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
+    to_encode["exp"] = int(time.time() + lifetime.total_seconds())
     return jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
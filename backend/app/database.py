@@ -1,5 +1,9 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from itertools import islice
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from .core.config import get_settings
 
@@ -10,14 +14,23 @@ class Base(DeclarativeBase):
 
 settings = get_settings()
 connect_args: dict = {}
+pool_args: dict = {}
 if settings.database_url.startswith("sqlite"):
     connect_args["check_same_thread"] = False
+else:
+    # TCP keepalives detect dead connections without a pre-ping round-trip per checkout.
+    connect_args.update(keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+    pool_args.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+    )
 
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,
     future=True,
     connect_args=connect_args,
+    **pool_args,
 )
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
@@ -28,3 +41,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def bulk_insert(
+    db: Session,
+    model: type[Base],
+    rows: Iterable[Mapping[str, Any]],
+    batch_size: int = 5000,
+) -> None:
+    """Insert rows with one executemany per batch instead of one INSERT per object."""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, batch_size)):
+        db.execute(insert(model), batch)
+
+
+def upsert_insert(db: Session, model: type[Base]):
+    """Dialect-specific INSERT that supports ``on_conflict_do_nothing``."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
@@ -1,5 +1,14 @@
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime
+from typing import Any
+
+import jwt
+from cachetools import TLRUCache, TTLCache
 from fastapi import Depends, HTTPException, status
-from jose import JWTError, jwt
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from .core.config import get_settings
@@ -9,31 +18,114 @@ from .database import get_db
 from .models.user import CoachAthlete, User
 from .schemas.user import TokenData
 
+settings = get_settings()
+_JWT_KEY = settings.jwt_secret_key
+_JWT_ALGORITHMS = [settings.jwt_algorithm]
+_JWT_OPTIONS = {"require": ["exp"]}
+
+_TOKEN_CACHE_SECONDS = 30
+_COACH_ATHLETES_CACHE_SECONDS = 30
+_CURRENT_USER_CACHE_SECONDS = 30
+
+
+def _token_expiry(_token: str, payload: dict[str, Any], now: float) -> float:
+    return min(now + _TOKEN_CACHE_SECONDS, payload["exp"])
+
+
+# Tokens are immutable until they expire, so the decoded claims can be reused
+# across requests instead of re-verifying the signature every time. Entries
+# never outlive the token's own exp claim, and failed decodes are not cached.
+_token_claims_cache: TLRUCache = TLRUCache(maxsize=10_000, ttu=_token_expiry, timer=time.time)
+_token_claims_lock = threading.Lock()
+
+
+def _decode_token(token: str) -> dict[str, Any]:
+    with _token_claims_lock:
+        payload = _token_claims_cache.get(token)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS, options=_JWT_OPTIONS)
+    with _token_claims_lock:
+        _token_claims_cache[token] = payload
+    return payload
+
+
+# Coach/athlete links are only ever added, so a cached set can grant access
+# but never deny it: a miss reloads the coach's athletes before refusing.
+_coach_athletes_cache: TTLCache = TTLCache(maxsize=10_000, ttl=_COACH_ATHLETES_CACHE_SECONDS)
+_coach_athletes_lock = threading.Lock()
+
+
+def _coach_has_athlete(db: Session, coach_id: int, athlete_id: int) -> bool:
+    with _coach_athletes_lock:
+        athlete_ids = _coach_athletes_cache.get(coach_id)
+    if athlete_ids is not None and athlete_id in athlete_ids:
+        return True
+    athlete_ids = frozenset(
+        db.scalars(select(CoachAthlete.athlete_id).where(CoachAthlete.coach_id == coach_id))
+    )
+    with _coach_athletes_lock:
+        _coach_athletes_cache[coach_id] = athlete_ids
+    return athlete_id in athlete_ids
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """The authenticated user's identity columns, detached from any Session."""
+
+    id: int
+    name: str
+    email: str
+    role: UserRole
+    created_at: datetime
+
+
+_current_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=_CURRENT_USER_CACHE_SECONDS)
+_current_user_lock = threading.Lock()
+
+
+def _load_current_user(db: Session, user_id: int) -> CurrentUser | None:
+    with _current_user_lock:
+        user = _current_user_cache.get(user_id)
+    if user is not None:
+        return user
+    row = db.execute(
+        select(User.id, User.name, User.email, User.role, User.created_at).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    user = CurrentUser(*row)
+    with _current_user_lock:
+        _current_user_cache[user_id] = user
+    return user
+
 
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
-    settings = get_settings()
+) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials.",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-    except JWTError:
+        payload = _decode_token(token)
+    except jwt.InvalidTokenError:
         raise credentials_exception
     token_data = TokenData.model_validate(payload)
     if not token_data.sub:
         raise credentials_exception
-    user = db.get(User, int(token_data.sub))
+    user = _load_current_user(db, int(token_data.sub))
     if user is None:
         raise credentials_exception
     return user
 
 
+@lru_cache
 def require_role(expected_role: UserRole):
-    def _role_dependency(current_user: User = Depends(get_current_user)) -> User:
+    # One dependency callable per role, so FastAPI's per-request dependency
+    # cache treats every require_role(role) as the same dependency.
+    def _role_dependency(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
         if current_user.role != expected_role:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role.")
         return current_user
@@ -43,20 +135,12 @@ def require_role(expected_role: UserRole):
 
 def ensure_athlete_access(
     athlete_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> User:
+) -> CurrentUser:
     if current_user.role == UserRole.ATHLETE and current_user.id != athlete_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied.")
     if current_user.role == UserRole.COACH:
-        link_exists = (
-            db.query(CoachAthlete)
-            .filter(
-                CoachAthlete.coach_id == current_user.id,
-                CoachAthlete.athlete_id == athlete_id,
-            )
-            .first()
-        )
-        if not link_exists:
+        if not _coach_has_athlete(db, current_user.id, athlete_id):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied.")
     return current_user
@@ -1,10 +1,63 @@
+import logging
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+from anyio import to_thread
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
+from .core.config import get_settings
 from .routers import athletes, auth, plans, sessions, dashboard
 
+
+class _RootForwarder(logging.Handler):
+    """Hands dequeued records to whatever handlers the root logger has at the time."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger().handle(record)
+
+
+def _start_queue_logging() -> QueueListener:
+    # Request threads only enqueue records from the app's own loggers; a single
+    # listener thread does the blocking writes through the root handlers
+    # (stderr by default). The root logger itself is left untouched, so
+    # handlers installed by the server or a test runner keep working.
+    app_logger = logging.getLogger(__package__)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    app_logger.addHandler(QueueHandler(log_queue))
+    app_logger.propagate = False
+    listener = QueueListener(log_queue, _RootForwarder())
+    listener.start()
+    return listener
+
+
+def _stop_queue_logging(listener: QueueListener) -> None:
+    listener.stop()
+    app_logger = logging.getLogger(__package__)
+    for handler in app_logger.handlers[:]:
+        if isinstance(handler, QueueHandler) and handler.queue is listener.queue:
+            app_logger.removeHandler(handler)
+    app_logger.propagate = True
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Sync endpoints and dependencies run on AnyIO's worker threads; the default
+    # limit of 40 saturates long before the database does.
+    to_thread.current_default_thread_limiter().total_tokens = get_settings().threadpool_size
+    listener = _start_queue_logging()
+    try:
+        yield
+    finally:
+        _stop_queue_logging(listener)
+
+
 app = FastAPI(
     title="Athletics Training Platform",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.include_router(auth.router)
@@ -15,5 +68,5 @@ app.include_router(dashboard.router)
 
 
 @app.get("/health", tags=["health"])
-def healthcheck() -> dict[str, str]:
+async def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
@@ -1,11 +1,12 @@
 from datetime import date
 from typing import Optional
 
-from sqlalchemy import Date, Enum, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import Date, ForeignKey, Index, Integer, Numeric, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..core.enums import SessionType
 from ..database import Base
+from .types import SessionTypeType
 
 
 class TrainingPlan(Base):
@@ -26,11 +27,12 @@ class TrainingPlan(Base):
 
 class TrainingSessionPlanned(Base):
     __tablename__ = "training_sessions_planned"
+    __table_args__ = (Index("ix_sessions_planned_plan_date", "plan_id", "date"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     plan_id: Mapped[int] = mapped_column(ForeignKey("training_plans.id", ondelete="CASCADE"))
     date: Mapped[date] = mapped_column(Date, nullable=False)
-    type: Mapped[SessionType] = mapped_column(Enum(SessionType, native_enum=False))
+    type: Mapped[SessionType] = mapped_column(SessionTypeType())
     title: Mapped[str] = mapped_column(String(120), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text)
     planned_distance: Mapped[Optional[float]] = mapped_column(Numeric(5, 2))
@@ -1,15 +1,41 @@
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import Date, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, Numeric, String, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from ..core.enums import SessionType
 from ..database import Base
 from .plan import TrainingSessionPlanned
+from .types import SessionTypeType
 
 
 class TrainingSessionDone(Base):
     __tablename__ = "training_sessions_done"
+    __table_args__ = (
+        Index(
+            "ix_sessions_done_athlete_date",
+            "athlete_id",
+            "date",
+            postgresql_include=["actual_distance", "actual_rpe"],
+        ),
+        Index(
+            "ux_sessions_done_athlete_planned",
+            "athlete_id",
+            "planned_session_id",
+            unique=True,
+            postgresql_where=text("planned_session_id IS NOT NULL"),
+            sqlite_where=text("planned_session_id IS NOT NULL"),
+        ),
+        Index(
+            "ux_sessions_done_athlete_manual_date",
+            "athlete_id",
+            "date",
+            unique=True,
+            postgresql_where=text("planned_session_id IS NULL"),
+            sqlite_where=text("planned_session_id IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     athlete_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
@@ -17,11 +43,16 @@ class TrainingSessionDone(Base):
         ForeignKey("training_sessions_planned.id", ondelete="SET NULL"), nullable=True
     )
     date: Mapped[date] = mapped_column(Date, nullable=False)
+    # Copied from the planned session so history can group without a join.
+    session_type: Mapped[Optional[SessionType]] = mapped_column(SessionTypeType(), nullable=True)
     actual_distance: Mapped[Optional[float]] = mapped_column(Numeric(6, 2))
     actual_duration: Mapped[Optional[int]] = mapped_column(Integer)
     actual_rpe: Mapped[Optional[int]] = mapped_column(Integer)
     surface: Mapped[Optional[str]] = mapped_column(String(80))
     shoes: Mapped[Optional[str]] = mapped_column(String(120))
     notes: Mapped[Optional[str]] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
 
     planned_session: Mapped[Optional[TrainingSessionPlanned]] = relationship()
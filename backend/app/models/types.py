@@ -0,0 +1,59 @@
+import enum
+from typing import Any, ClassVar
+
+from sqlalchemy import CHAR
+from sqlalchemy.types import TypeDecorator
+
+from ..core.enums import InviteStatus, SessionType, UserRole
+
+
+class CodedEnum(TypeDecorator):
+    """Persists an enum member as a single-character code."""
+
+    impl = CHAR(1)
+    cache_ok = True
+
+    codes: ClassVar[dict[enum.Enum, str]]
+    members_by_code: ClassVar[dict[str | None, enum.Enum | None]]
+    codes_by_value: ClassVar[dict[Any, str | None]]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Flat lookups built once so per-row conversion is a single dict access.
+        # The enums subclass str, so member and raw-value keys hash the same.
+        cls.members_by_code = {None: None, **{code: member for member, code in cls.codes.items()}}
+        cls.codes_by_value = {None: None, **cls.codes}
+
+    def bind_processor(self, dialect):
+        return self.codes_by_value.__getitem__
+
+    def result_processor(self, dialect, coltype):
+        return self.members_by_code.__getitem__
+
+    def process_literal_param(self, value: Any, dialect) -> str | None:
+        # Only used when rendering literal SQL; statements go through bind_processor.
+        return self.codes_by_value[value]
+
+
+class UserRoleType(CodedEnum):
+    cache_ok = True
+    codes = {UserRole.ATHLETE: "A", UserRole.COACH: "C"}
+
+
+class SessionTypeType(CodedEnum):
+    cache_ok = True
+    codes = {
+        SessionType.RODAJE: "R",
+        SessionType.PASADAS: "P",
+        SessionType.FARTLEK: "F",
+        SessionType.CUESTAS: "U",
+        SessionType.FUERZA: "Z",
+        SessionType.TECNICA: "T",
+        SessionType.COMPETENCIA: "X",
+        SessionType.DESCANSO: "D",
+    }
+
+
+class InviteStatusType(CodedEnum):
+    cache_ok = True
+    codes = {InviteStatus.PENDING: "P", InviteStatus.ACCEPTED: "A", InviteStatus.DECLINED: "D"}
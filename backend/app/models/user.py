@@ -1,11 +1,12 @@
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import Date, DateTime, Enum, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..core.enums import InviteStatus, UserRole
 from ..database import Base
+from .types import InviteStatusType, UserRoleType
 
 
 class User(Base):
@@ -15,7 +16,7 @@ class User(Base):
     name: Mapped[str] = mapped_column(String(150), nullable=False)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
-    role: Mapped[UserRole] = mapped_column(Enum(UserRole, native_enum=False), nullable=False)
+    role: Mapped[UserRole] = mapped_column(UserRoleType(), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.utcnow, nullable=False
     )
@@ -60,15 +61,30 @@ class CoachAthlete(Base):
     since_date: Mapped[date] = mapped_column(Date, default=date.today, nullable=False)
 
     coach: Mapped[User] = relationship(
-        back_populates="coached_links", foreign_keys=[coach_id], lazy="joined"
+        back_populates="coached_links", foreign_keys=[coach_id], lazy="raise"
     )
     athlete: Mapped[User] = relationship(
-        back_populates="assigned_coaches", foreign_keys=[athlete_id], lazy="joined"
+        back_populates="assigned_coaches", foreign_keys=[athlete_id], lazy="raise"
     )
 
 
+PENDING_INVITE_PREDICATE = text("status = 'P'")
+
+
 class CoachInvite(Base):
     __tablename__ = "coach_invites"
+    __table_args__ = (
+        Index(
+            "ux_coach_invites_pending_email",
+            "coach_id",
+            "athlete_email",
+            unique=True,
+            postgresql_where=PENDING_INVITE_PREDICATE,
+            sqlite_where=PENDING_INVITE_PREDICATE,
+        ),
+        Index("ix_coach_invites_coach_created", "coach_id", "created_at"),
+        Index("ix_coach_invites_athlete_created", "athlete_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     coach_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -77,10 +93,10 @@ class CoachInvite(Base):
     )
     athlete_email: Mapped[str] = mapped_column(String(255), nullable=False)
     status: Mapped[InviteStatus] = mapped_column(
-        Enum(InviteStatus, native_enum=False), default=InviteStatus.PENDING, nullable=False
+        InviteStatusType(), default=InviteStatus.PENDING, nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     responded_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
-    coach: Mapped[User] = relationship("User", foreign_keys=[coach_id], lazy="joined")
-    athlete: Mapped[Optional[User]] = relationship("User", foreign_keys=[athlete_id], lazy="joined")
+    coach: Mapped[User] = relationship("User", foreign_keys=[coach_id], lazy="selectin")
+    athlete: Mapped[Optional[User]] = relationship("User", foreign_keys=[athlete_id], lazy="selectin")
@@ -1,16 +1,15 @@
 from datetime import date, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, cast, literal
-from sqlalchemy.types import String
+from sqlalchemy import and_, case, func, lambda_stmt, select
 from sqlalchemy.orm import Session
 
 from ..core.enums import UserRole
 from ..database import get_db
-from ..dependencies import get_current_user, require_role, ensure_athlete_access
+from ..dependencies import CurrentUser, ensure_athlete_access, require_role
 from ..models.plan import TrainingPlan, TrainingSessionPlanned
 from ..models.session import TrainingSessionDone
-from ..models.user import AthleteProfile, CoachAthlete, User
+from ..models.user import AthleteProfile
 from ..schemas.history import AthleteHistorySummary
 from ..schemas.athlete import AthleteTodayOverview, SessionOverview, WeeklyStat
 from ..schemas.session import TrainingSessionDoneRead
@@ -21,7 +20,7 @@ router = APIRouter(prefix="/athletes", tags=["athletes"])
 
 @router.get("/me", response_model=AthleteProfileRead)
 def get_my_profile(
-    current_user: User = Depends(require_role(UserRole.ATHLETE)),
+    current_user: CurrentUser = Depends(require_role(UserRole.ATHLETE)),
     db: Session = Depends(get_db),
 ) -> AthleteProfile:
     profile = db.get(AthleteProfile, current_user.id)
@@ -36,7 +35,7 @@ def get_my_profile(
 @router.put("/me", response_model=AthleteProfileRead)
 def update_my_profile(
     payload: AthleteProfileUpdate,
-    current_user: User = Depends(require_role(UserRole.ATHLETE)),
+    current_user: CurrentUser = Depends(require_role(UserRole.ATHLETE)),
     db: Session = Depends(get_db),
 ) -> AthleteProfile:
     profile = db.get(AthleteProfile, current_user.id)
@@ -53,42 +52,42 @@ def update_my_profile(
 @router.get("/{athlete_id}/summary", response_model=AthleteSummary)
 def athlete_summary(
     athlete_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(ensure_athlete_access),
     db: Session = Depends(get_db),
 ) -> AthleteSummary:
-    ensure_athlete_access(athlete_id, current_user=current_user, db=db)
-    total_plans = db.query(TrainingPlan).filter(TrainingPlan.athlete_id == athlete_id).count()
-    planned_sessions = (
-        db.query(TrainingSessionPlanned)
-        .join(TrainingPlan)
-        .filter(TrainingPlan.athlete_id == athlete_id)
-        .count()
-    )
-    completed_sessions = (
-        db.query(TrainingSessionDone).filter(TrainingSessionDone.athlete_id == athlete_id).count()
-    )
-    total_distance = (
-        db.query(func.coalesce(func.sum(TrainingSessionDone.actual_distance), 0))
-        .filter(TrainingSessionDone.athlete_id == athlete_id)
-        .scalar()
-        or 0
+    stmt = lambda_stmt(
+        lambda: select(
+            select(func.count(TrainingPlan.id))
+            .where(TrainingPlan.athlete_id == athlete_id)
+            .scalar_subquery(),
+            select(func.count(TrainingSessionPlanned.id))
+            .join(TrainingPlan, TrainingPlan.id == TrainingSessionPlanned.plan_id)
+            .where(TrainingPlan.athlete_id == athlete_id)
+            .scalar_subquery(),
+            select(func.count(TrainingSessionDone.id))
+            .where(TrainingSessionDone.athlete_id == athlete_id)
+            .scalar_subquery(),
+            select(func.coalesce(func.sum(TrainingSessionDone.actual_distance), 0))
+            .where(TrainingSessionDone.athlete_id == athlete_id)
+            .scalar_subquery(),
+        )
     )
+    total_plans, planned_sessions, completed_sessions, total_distance = db.execute(stmt).one()
     return AthleteSummary(
         athlete_id=athlete_id,
         total_plans=total_plans,
         planned_sessions=planned_sessions,
         completed_sessions=completed_sessions,
-        total_distance_km=float(total_distance),
+        total_distance_km=float(total_distance or 0),
     )
 
 
 @router.get("/{athlete_id}/history", response_model=AthleteHistorySummary)
 def athlete_history(
     athlete_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(ensure_athlete_access),
     db: Session = Depends(get_db),
 ) -> AthleteHistorySummary:
-    ensure_athlete_access(athlete_id, current_user=current_user, db=db)
     today = date.today()
     week_start = today - timedelta(days=6)
     month_start = today - timedelta(days=29)
@@ -96,28 +95,22 @@ def athlete_history(
     week_stats = _aggregate_period(db, athlete_id, week_start, today)
     month_stats = _aggregate_period(db, athlete_id, month_start, today)
 
-    session_type_label = func.coalesce(
-        cast(TrainingSessionPlanned.type, String),
-        literal("MANUAL"),
-    )
     type_counts = (
         db.query(
-            session_type_label,
+            TrainingSessionDone.session_type,
             func.count(TrainingSessionDone.id),
         )
-        .outerjoin(
-            TrainingSessionPlanned,
-            TrainingSessionDone.planned_session_id == TrainingSessionPlanned.id,
-        )
         .filter(
             TrainingSessionDone.athlete_id == athlete_id,
             TrainingSessionDone.date >= month_start,
             TrainingSessionDone.date <= today,
         )
-        .group_by(session_type_label)
+        .group_by(TrainingSessionDone.session_type)
         .all()
     )
-    distribution = {str(session_type): count for session_type, count in type_counts}
+    distribution = {
+        session_type.value if session_type else "MANUAL": count for session_type, count in type_counts
+    }
 
     summary = AthleteHistorySummary(
         athlete_id=athlete_id,
@@ -135,35 +128,30 @@ def athlete_history(
 @router.get("/{athlete_id}/today", response_model=AthleteTodayOverview)
 def athlete_today_overview(
     athlete_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(ensure_athlete_access),
     db: Session = Depends(get_db),
 ) -> AthleteTodayOverview:
-    ensure_athlete_access(athlete_id, current_user=current_user, db=db)
     today = date.today()
 
-    sessions = (
-        db.query(TrainingSessionPlanned)
-        .join(TrainingPlan)
-        .filter(
+    rows = db.execute(
+        select(TrainingSessionPlanned, TrainingSessionDone)
+        .join(TrainingPlan, TrainingPlan.id == TrainingSessionPlanned.plan_id)
+        .outerjoin(
+            TrainingSessionDone,
+            and_(
+                TrainingSessionDone.planned_session_id == TrainingSessionPlanned.id,
+                TrainingSessionDone.athlete_id == athlete_id,
+            ),
+        )
+        .where(
             TrainingPlan.athlete_id == athlete_id,
             TrainingSessionPlanned.date >= today,
         )
         .order_by(TrainingSessionPlanned.date.asc())
         .limit(5)
-        .all()
-    )
-    session_ids = [s.id for s in sessions]
-    done_map: dict[int, TrainingSessionDone] = {}
-    if session_ids:
-        completions = (
-            db.query(TrainingSessionDone)
-            .filter(
-                TrainingSessionDone.athlete_id == athlete_id,
-                TrainingSessionDone.planned_session_id.in_(session_ids),
-            )
-            .all()
-        )
-        done_map = {c.planned_session_id: c for c in completions if c.planned_session_id}
+    ).all()
+    sessions = [planned for planned, _ in rows]
+    done_map: dict[int, TrainingSessionDone] = {planned.id: done for planned, done in rows if done}
 
     def to_overview(session: TrainingSessionPlanned) -> SessionOverview:
         completed_session = done_map.get(session.id)
@@ -199,19 +187,18 @@ def athlete_today_overview(
 
 
 def _aggregate_period(db: Session, athlete_id: int, start_date: date, end_date: date) -> dict[str, float | int | None]:
-    total_distance, sessions, avg_rpe = (
-        db.query(
+    stmt = lambda_stmt(
+        lambda: select(
             func.coalesce(func.sum(TrainingSessionDone.actual_distance), 0),
             func.count(TrainingSessionDone.id),
             func.avg(TrainingSessionDone.actual_rpe),
-        )
-        .filter(
+        ).where(
             TrainingSessionDone.athlete_id == athlete_id,
             TrainingSessionDone.date >= start_date,
             TrainingSessionDone.date <= end_date,
         )
-        .one()
     )
+    total_distance, sessions, avg_rpe = db.execute(stmt).one()
     return {
         "total_distance": float(total_distance or 0),
         "sessions": sessions,
@@ -222,28 +209,39 @@ def _aggregate_period(db: Session, athlete_id: int, start_date: date, end_date:
 @router.get("/{athlete_id}/weekly-stats", response_model=list[WeeklyStat])
 def athlete_weekly_stats(
     athlete_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(ensure_athlete_access),
     db: Session = Depends(get_db),
 ) -> list[WeeklyStat]:
-    ensure_athlete_access(athlete_id, current_user=current_user, db=db)
     today = date.today()
-    stats: list[WeeklyStat] = []
-    for offset in range(0, 4):
-        end_date = today - timedelta(days=7 * offset)
-        start_date = end_date - timedelta(days=6)
-        total_distance, sessions, avg_rpe = (
-            db.query(
-                func.coalesce(func.sum(TrainingSessionDone.actual_distance), 0),
-                func.count(TrainingSessionDone.id),
-                func.avg(TrainingSessionDone.actual_rpe),
-            )
-            .filter(
-                TrainingSessionDone.athlete_id == athlete_id,
-                TrainingSessionDone.date >= start_date,
-                TrainingSessionDone.date <= end_date,
-            )
-            .one()
+    weeks = 4
+    period_ends = [today - timedelta(days=7 * offset) for offset in range(weeks)]
+    week_starts = [period_end - timedelta(days=6) for period_end in period_ends]
+    current_start, previous_start, older_start, window_start = week_starts
+    stmt = lambda_stmt(
+        lambda: select(
+            case(
+                (TrainingSessionDone.date >= current_start, 0),
+                (TrainingSessionDone.date >= previous_start, 1),
+                (TrainingSessionDone.date >= older_start, 2),
+                else_=3,
+            ).label("week_bucket"),
+            func.coalesce(func.sum(TrainingSessionDone.actual_distance), 0),
+            func.count(TrainingSessionDone.id),
+            func.avg(TrainingSessionDone.actual_rpe),
+        )
+        .where(
+            TrainingSessionDone.athlete_id == athlete_id,
+            TrainingSessionDone.date >= window_start,
+            TrainingSessionDone.date <= today,
         )
+        .group_by("week_bucket")
+    )
+    rows = db.execute(stmt).all()
+    by_bucket = {bucket: (total_distance, sessions, avg_rpe) for bucket, total_distance, sessions, avg_rpe in rows}
+
+    stats: list[WeeklyStat] = []
+    for offset, (start_date, end_date) in enumerate(zip(week_starts, period_ends)):
+        total_distance, sessions, avg_rpe = by_bucket.get(offset, (0, 0, None))
         stats.append(
             WeeklyStat(
                 start_date=start_date,
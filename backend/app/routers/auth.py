@@ -1,13 +1,16 @@
+import threading
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy import exists, select
 from sqlalchemy.orm import Session
 
 from ..core.enums import InviteStatus, UserRole
 from ..core.security import create_access_token, get_password_hash, verify_password
-from ..database import get_db
-from ..dependencies import get_current_user, require_role
-from ..models.user import AthleteProfile, CoachAthlete, CoachInvite, User
+from ..database import get_db, upsert_insert
+from ..dependencies import CurrentUser, get_current_user, require_role
+from ..models.user import PENDING_INVITE_PREDICATE, AthleteProfile, CoachAthlete, CoachInvite, User
 from ..schemas.user import (
     CoachInviteRequest,
     CoachInviteRead,
@@ -21,20 +24,29 @@ from ..services.notifications import (
     send_invite_email,
     send_invite_reminder,
 )
+from ..services.coach_links import link_coach_athlete
+from ..services.dashboard_cache import invalidate_coach_dashboards
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Invites are attached at registration and when sent to a known athlete, so the
+# catch-up in list_athlete_invites only needs to run once a minute per athlete.
+_recently_attached: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_recently_attached_lock = threading.Lock()
+
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def register_user(user_in: UserCreate, db: Session = Depends(get_db)) -> User:
-    existing = db.query(User).filter(User.email == user_in.email).first()
-    if existing:
+    if db.scalar(select(exists().where(User.email == user_in.email))):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered.")
+    # End the read transaction so the pooled connection isn't held while bcrypt runs.
+    db.rollback()
+    password_hash = get_password_hash(user_in.password)
     user = User(
         name=user_in.name,
         email=user_in.email,
         role=user_in.role,
-        password_hash=get_password_hash(user_in.password),
+        password_hash=password_hash,
     )
     db.add(user)
     db.flush()
@@ -48,20 +60,23 @@ def register_user(user_in: UserCreate, db: Session = Depends(get_db)) -> User:
 
 @router.post("/login", response_model=Token)
 def login(email: str, password: str, db: Session = Depends(get_db)) -> Token:
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.password_hash):
+    credentials = db.execute(
+        select(User.id, User.password_hash, User.role).where(User.email == email)
+    ).first()
+    db.rollback()
+    if not credentials or not verify_password(password, credentials.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials.")
-    access_token = create_access_token({"sub": str(user.id), "role": user.role.value})
+    access_token = create_access_token({"sub": str(credentials.id), "role": credentials.role.value})
     return Token(access_token=access_token)
 
 
 @router.get("/me", response_model=UserRead)
-def read_me(current_user: User = Depends(get_current_user)) -> User:
+async def read_me(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     return current_user
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(current_user: User = Depends(get_current_user)) -> Token:
+async def refresh_token(current_user: CurrentUser = Depends(get_current_user)) -> Token:
     access_token = create_access_token({"sub": str(current_user.id), "role": current_user.role.value})
     return Token(access_token=access_token)
 
@@ -70,7 +85,7 @@ def refresh_token(current_user: User = Depends(get_current_user)) -> Token:
 def invite_athlete(
     payload: CoachInviteRequest,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(require_role(UserRole.COACH)),
+    current_user: CurrentUser = Depends(require_role(UserRole.COACH)),
     db: Session = Depends(get_db),
 ) -> CoachInvite:
     athlete = db.query(User).filter(User.email == payload.athlete_email).first()
@@ -84,6 +99,25 @@ def invite_athlete(
         )
         if existing:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Athlete already linked.")
+    invite_id = db.scalar(
+        upsert_insert(db, CoachInvite)
+        .values(
+            coach_id=current_user.id,
+            athlete_id=athlete.id if athlete else None,
+            athlete_email=athlete.email if athlete else payload.athlete_email,
+            status=InviteStatus.PENDING,
+        )
+        .on_conflict_do_nothing(
+            index_elements=["coach_id", "athlete_email"],
+            index_where=PENDING_INVITE_PREDICATE,
+        )
+        .returning(CoachInvite.id)
+    )
+    if invite_id is not None:
+        db.commit()
+        invite = db.get(CoachInvite, invite_id)
+        background_tasks.add_task(send_invite_email, invite.coach.name, invite.athlete_email)
+        return invite
     invite = (
         db.query(CoachInvite)
         .filter(
@@ -91,62 +125,61 @@ def invite_athlete(
             CoachInvite.athlete_email == payload.athlete_email,
             CoachInvite.status == InviteStatus.PENDING,
         )
-        .first()
+        .one()
     )
-    if invite:
-        if athlete and invite.athlete_id is None:
-            invite.athlete_id = athlete.id
-            db.commit()
-            db.refresh(invite)
-            background_tasks.add_task(send_invite_email, invite)
-        return invite
-    invite = CoachInvite(
-        coach_id=current_user.id,
-        athlete_id=athlete.id if athlete else None,
-        athlete_email=athlete.email if athlete else payload.athlete_email,
-        status=InviteStatus.PENDING,
-    )
-    db.add(invite)
-    db.commit()
-    db.refresh(invite)
-    background_tasks.add_task(send_invite_email, invite)
+    if athlete and invite.athlete_id is None:
+        invite.athlete_id = athlete.id
+        db.commit()
+        db.refresh(invite)
+        background_tasks.add_task(send_invite_email, invite.coach.name, invite.athlete_email)
     return invite
 
 
 @router.get("/invitations/coach", response_model=list[CoachInviteRead])
 def list_coach_invites(
-    current_user: User = Depends(require_role(UserRole.COACH)),
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    current_user: CurrentUser = Depends(require_role(UserRole.COACH)),
     db: Session = Depends(get_db),
 ) -> list[CoachInvite]:
-    return (
-        db.query(CoachInvite)
-        .filter(CoachInvite.coach_id == current_user.id)
+    return db.scalars(
+        select(CoachInvite)
+        .where(CoachInvite.coach_id == current_user.id)
         .order_by(CoachInvite.created_at.desc())
-        .all()
-    )
+        .limit(limit)
+        .offset(offset)
+    ).all()
 
 
 @router.get("/invitations/athlete", response_model=list[CoachInviteRead])
 def list_athlete_invites(
-    current_user: User = Depends(require_role(UserRole.ATHLETE)),
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    current_user: CurrentUser = Depends(require_role(UserRole.ATHLETE)),
     db: Session = Depends(get_db),
 ) -> list[CoachInvite]:
-    _attach_pending_invites_to_user(db, current_user, commit=True)
-    return (
-        db.query(CoachInvite)
-        .filter(
-            CoachInvite.athlete_id == current_user.id,
-        )
+    # Check and mark in one step so concurrent requests run the catch-up once;
+    # the database work itself stays outside the lock.
+    with _recently_attached_lock:
+        attach = current_user.id not in _recently_attached
+        if attach:
+            _recently_attached[current_user.id] = True
+    if attach:
+        _attach_pending_invites_to_user(db, current_user, commit=True)
+    return db.scalars(
+        select(CoachInvite)
+        .where(CoachInvite.athlete_id == current_user.id)
         .order_by(CoachInvite.created_at.desc())
-        .all()
-    )
+        .limit(limit)
+        .offset(offset)
+    ).all()
 
 
 @router.post("/invitations/{invite_id}/remind", response_model=CoachInviteRead)
 def remind_invite(
     invite_id: int,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(require_role(UserRole.COACH)),
+    current_user: CurrentUser = Depends(require_role(UserRole.COACH)),
     db: Session = Depends(get_db),
 ) -> CoachInvite:
     invite = db.get(CoachInvite, invite_id)
@@ -154,7 +187,7 @@ def remind_invite(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invite not found.")
     if invite.status != InviteStatus.PENDING:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invite already processed.")
-    background_tasks.add_task(send_invite_reminder, invite)
+    background_tasks.add_task(send_invite_reminder, invite.coach.name, invite.athlete_email)
     return invite
 
 
@@ -163,7 +196,7 @@ def respond_invite(
     invite_id: int,
     payload: CoachInviteResponse,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(require_role(UserRole.ATHLETE)),
+    current_user: CurrentUser = Depends(require_role(UserRole.ATHLETE)),
     db: Session = Depends(get_db),
 ) -> CoachInvite:
     invite = db.get(CoachInvite, invite_id)
@@ -173,35 +206,34 @@ def respond_invite(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invite already processed.")
     invite.responded_at = datetime.utcnow()
     if payload.action == "ACCEPT":
-        existing_link = (
-            db.query(CoachAthlete)
-            .filter(CoachAthlete.coach_id == invite.coach_id, CoachAthlete.athlete_id == current_user.id)
-            .first()
-        )
-        if not existing_link:
-            db.add(CoachAthlete(coach_id=invite.coach_id, athlete_id=current_user.id))
+        link_coach_athlete(db, invite.coach_id, current_user.id)
         invite.status = InviteStatus.ACCEPTED
     else:
         invite.status = InviteStatus.DECLINED
     db.commit()
     db.refresh(invite)
     if invite.status == InviteStatus.ACCEPTED:
-        background_tasks.add_task(send_invite_accepted, invite)
+        invalidate_coach_dashboards([invite.coach_id])
+        background_tasks.add_task(
+            send_invite_accepted,
+            invite.coach.email,
+            invite.athlete.name if invite.athlete else invite.athlete_email,
+        )
     return invite
 
 
-def _attach_pending_invites_to_user(db: Session, athlete: User, commit: bool = False) -> None:
+def _attach_pending_invites_to_user(
+    db: Session, athlete: User | CurrentUser, commit: bool = False
+) -> None:
     if athlete.role != UserRole.ATHLETE:
         return
-    pending = (
-        db.query(CoachInvite)
-        .filter(
+    pending = db.scalars(
+        select(CoachInvite).where(
             CoachInvite.athlete_id.is_(None),
             CoachInvite.athlete_email == athlete.email,
             CoachInvite.status == InviteStatus.PENDING,
         )
-        .all()
-    )
+    ).all()
     if not pending:
         return
     for invite in pending:
@@ -1,12 +1,13 @@
+import heapq
 from datetime import date, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 
 from ..core.enums import UserRole
 from ..database import get_db
-from ..dependencies import ensure_athlete_access, require_role
+from ..dependencies import CurrentUser, ensure_athlete_access, require_role
 from ..models.plan import TrainingPlan, TrainingSessionPlanned
 from ..models.session import TrainingSessionDone
 from ..models.user import CoachAthlete, User
@@ -18,25 +19,33 @@ from ..schemas.dashboard import (
     CoachOverview,
     CoachTrendPoint,
 )
+from ..services.dashboard_cache import cached_dashboard
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
 @router.get("/coach/me", response_model=list[AthleteMetrics])
 def coach_dashboard(
-    current_user: User = Depends(require_role(UserRole.COACH)),
+    current_user: CurrentUser = Depends(require_role(UserRole.COACH)),
     db: Session = Depends(get_db),
 ) -> list[AthleteMetrics]:
-    metrics, _ = _build_coach_metrics(db, current_user.id)
-    return metrics
+    return cached_dashboard(
+        current_user.id, "metrics", lambda: _build_coach_metrics(db, current_user.id)[0]
+    )
 
 
 @router.get("/coach/overview", response_model=CoachOverview)
 def coach_overview(
-    current_user: User = Depends(require_role(UserRole.COACH)),
+    current_user: CurrentUser = Depends(require_role(UserRole.COACH)),
     db: Session = Depends(get_db),
 ) -> CoachOverview:
-    metrics, athlete_ids = _build_coach_metrics(db, current_user.id)
+    return cached_dashboard(
+        current_user.id, "overview", lambda: _build_coach_overview(db, current_user.id)
+    )
+
+
+def _build_coach_overview(db: Session, coach_id: int) -> CoachOverview:
+    metrics, athlete_ids = _build_coach_metrics(db, coach_id)
     if not metrics:
         return CoachOverview(
             total_athletes=0,
@@ -47,15 +56,21 @@ def coach_overview(
             trend=[],
             top_athletes=[],
         )
-    avg_distance = sum(m.completed_distance_week for m in metrics) / len(metrics)
-    compliance_values = [m.compliance_rate for m in metrics if m.compliance_rate is not None]
-    avg_compliance = (
-        round(sum(compliance_values) / len(compliance_values), 2) if compliance_values else None
-    )
-    pending_total = sum(m.pending_sessions_today for m in metrics)
-    low_compliance = sum(
-        1 for m in metrics if m.compliance_rate is not None and m.compliance_rate < 0.6
-    )
+    total_distance = 0.0
+    compliance_total = 0.0
+    compliance_count = 0
+    pending_total = 0
+    low_compliance = 0
+    for m in metrics:
+        total_distance += m.completed_distance_week
+        pending_total += m.pending_sessions_today
+        if m.compliance_rate is not None:
+            compliance_total += m.compliance_rate
+            compliance_count += 1
+            if m.compliance_rate < 0.6:
+                low_compliance += 1
+    avg_distance = total_distance / len(metrics)
+    avg_compliance = round(compliance_total / compliance_count, 2) if compliance_count else None
     top_athletes = [
         CoachAthleteHighlight(
             athlete_id=m.athlete_id,
@@ -65,14 +80,14 @@ def coach_overview(
             completed_distance_week=m.completed_distance_week,
             compliance_rate=m.compliance_rate,
         )
-        for m in sorted(
+        for m in heapq.nlargest(
+            3,
             metrics,
             key=lambda item: (
                 item.compliance_rate if item.compliance_rate is not None else -1,
                 item.completed_distance_week,
             ),
-            reverse=True,
-        )[:3]
+        )
     ]
     trend = _build_weekly_trend(db, athlete_ids)
     return CoachOverview(
@@ -89,108 +104,71 @@ def coach_overview(
 def _build_coach_metrics(db: Session, coach_id: int) -> tuple[list[AthleteMetrics], list[int]]:
     today = date.today()
     week_start = today - timedelta(days=6)
-    athlete_rows = (
-        db.query(CoachAthlete.athlete_id, User.name)
-        .join(User, User.id == CoachAthlete.athlete_id)
-        .filter(CoachAthlete.coach_id == coach_id)
-        .all()
-    )
-    if not athlete_rows:
-        return [], []
-    athlete_ids = [row.athlete_id for row in athlete_rows]
-
-    planned_by_athlete = {
-        athlete_id: count
-        for athlete_id, count in (
-            db.query(
-                TrainingPlan.athlete_id,
-                func.count(TrainingSessionPlanned.id),
-            )
-            .join(TrainingSessionPlanned, TrainingPlan.id == TrainingSessionPlanned.plan_id)
-            .filter(
-                TrainingPlan.athlete_id.in_(athlete_ids),
-                TrainingSessionPlanned.date >= week_start,
-                TrainingSessionPlanned.date <= today,
-            )
-            .group_by(TrainingPlan.athlete_id)
-            .all()
+    planned = (
+        select(
+            TrainingPlan.athlete_id.label("athlete_id"),
+            func.count().label("planned_week"),
+            func.count().filter(TrainingSessionPlanned.date == today).label("planned_today"),
         )
-    }
-
-    completed_by_athlete = {
-        athlete_id: (count, total_distance or 0)
-        for athlete_id, count, total_distance in (
-            db.query(
-                TrainingSessionDone.athlete_id,
-                func.count(TrainingSessionDone.id),
-                func.coalesce(func.sum(TrainingSessionDone.actual_distance), 0),
-            )
-            .filter(
-                TrainingSessionDone.athlete_id.in_(athlete_ids),
-                TrainingSessionDone.date >= week_start,
-                TrainingSessionDone.date <= today,
-            )
-            .group_by(TrainingSessionDone.athlete_id)
-            .all()
+        .join(TrainingSessionPlanned, TrainingPlan.id == TrainingSessionPlanned.plan_id)
+        .join(CoachAthlete, CoachAthlete.athlete_id == TrainingPlan.athlete_id)
+        .where(
+            CoachAthlete.coach_id == coach_id,
+            TrainingSessionPlanned.date >= week_start,
+            TrainingSessionPlanned.date <= today,
         )
-    }
-
-    planned_today = {
-        athlete_id: count
-        for athlete_id, count in (
-            db.query(
-                TrainingPlan.athlete_id,
-                func.count(TrainingSessionPlanned.id),
-            )
-            .join(TrainingSessionPlanned, TrainingPlan.id == TrainingSessionPlanned.plan_id)
-            .filter(
-                TrainingPlan.athlete_id.in_(athlete_ids),
-                TrainingSessionPlanned.date == today,
-            )
-            .group_by(TrainingPlan.athlete_id)
-            .all()
-        )
-    }
-
-    completed_today = {
-        athlete_id: count
-        for athlete_id, count in (
-            db.query(
-                TrainingSessionDone.athlete_id,
-                func.count(TrainingSessionDone.id),
-            )
-            .filter(
-                TrainingSessionDone.athlete_id.in_(athlete_ids),
-                TrainingSessionDone.date == today,
-            )
-            .group_by(TrainingSessionDone.athlete_id)
-            .all()
+        .group_by(TrainingPlan.athlete_id)
+        .subquery()
+    )
+    completed = (
+        select(
+            TrainingSessionDone.athlete_id.label("athlete_id"),
+            func.count().label("completed_week"),
+            func.coalesce(func.sum(TrainingSessionDone.actual_distance), 0).label("distance_week"),
+            func.count().filter(TrainingSessionDone.date == today).label("completed_today"),
         )
-    }
-
-    metrics: list[AthleteMetrics] = []
-    for athlete_id, athlete_name in athlete_rows:
-        planned_count = planned_by_athlete.get(athlete_id, 0)
-        completed_count, total_distance = completed_by_athlete.get(athlete_id, (0, 0))
-        compliance = (
-            round(completed_count / planned_count, 2) if planned_count > 0 else None
+        .join(CoachAthlete, CoachAthlete.athlete_id == TrainingSessionDone.athlete_id)
+        .where(
+            CoachAthlete.coach_id == coach_id,
+            TrainingSessionDone.date >= week_start,
+            TrainingSessionDone.date <= today,
         )
-        pending_today = max(
-            0,
-            planned_today.get(athlete_id, 0) - completed_today.get(athlete_id, 0),
+        .group_by(TrainingSessionDone.athlete_id)
+        .subquery()
+    )
+    planned_week = func.coalesce(planned.c.planned_week, 0)
+    planned_today = func.coalesce(planned.c.planned_today, 0)
+    completed_week = func.coalesce(completed.c.completed_week, 0)
+    completed_today = func.coalesce(completed.c.completed_today, 0)
+    rows = db.execute(
+        select(
+            CoachAthlete.athlete_id.label("athlete_id"),
+            User.name.label("athlete_name"),
+            planned_week.label("planned_sessions_week"),
+            completed_week.label("completed_sessions_week"),
+            func.coalesce(completed.c.distance_week, 0).label("completed_distance_week"),
+            case((planned_week > 0, completed_week * 1.0 / planned_week), else_=None).label("compliance_rate"),
+            case(
+                (planned_today > completed_today, planned_today - completed_today),
+                else_=0,
+            ).label("pending_sessions_today"),
         )
-        metrics.append(
-            AthleteMetrics(
-                athlete_id=athlete_id,
-                athlete_name=athlete_name,
-                planned_sessions_week=planned_count,
-                completed_sessions_week=completed_count,
-                completed_distance_week=float(total_distance or 0),
-                compliance_rate=compliance,
-                pending_sessions_today=pending_today,
-            )
+        .join(User, User.id == CoachAthlete.athlete_id)
+        .outerjoin(planned, planned.c.athlete_id == CoachAthlete.athlete_id)
+        .outerjoin(completed, completed.c.athlete_id == CoachAthlete.athlete_id)
+        .where(CoachAthlete.coach_id == coach_id)
+    ).all()
+    # Rounded in Python, half to even, like the overview and trend rates.
+    metrics = [
+        AthleteMetrics(
+            **{
+                **row._mapping,
+                "compliance_rate": round(row.compliance_rate, 2) if row.compliance_rate is not None else None,
+            }
         )
-    return metrics, athlete_ids
+        for row in rows
+    ]
+    return metrics, [metric.athlete_id for metric in metrics]
 
 
 def _build_weekly_trend(
@@ -201,35 +179,53 @@ def _build_weekly_trend(
     if not athlete_ids:
         return []
     today = date.today()
-    points: list[CoachTrendPoint] = []
-    for offset in range(weeks - 1, -1, -1):
-        period_end = today - timedelta(days=offset * 7)
-        period_start = period_end - timedelta(days=6)
-        planned_total = (
-            db.query(func.count(TrainingSessionPlanned.id))
+    period_ends = [today - timedelta(days=offset * 7) for offset in range(weeks)]
+    window_start = period_ends[-1] - timedelta(days=6)
+
+    def week_bucket(column):
+        return case(
+            *[
+                (column >= period_end - timedelta(days=6), offset)
+                for offset, period_end in enumerate(period_ends[:-1])
+            ],
+            else_=weeks - 1,
+        ).label("week_bucket")
+
+    planned_by_week = dict(
+        db.execute(
+            select(week_bucket(TrainingSessionPlanned.date), func.count())
             .join(TrainingPlan, TrainingPlan.id == TrainingSessionPlanned.plan_id)
-            .filter(
+            .where(
                 TrainingPlan.athlete_id.in_(athlete_ids),
-                TrainingSessionPlanned.date >= period_start,
-                TrainingSessionPlanned.date <= period_end,
+                TrainingSessionPlanned.date >= window_start,
+                TrainingSessionPlanned.date <= today,
             )
-            .scalar()
-            or 0
-        )
-        completed_row = (
-            db.query(
-                func.count(TrainingSessionDone.id),
+            .group_by("week_bucket")
+        ).all()
+    )
+    completed_by_week = {
+        bucket: (count, total_distance)
+        for bucket, count, total_distance in db.execute(
+            select(
+                week_bucket(TrainingSessionDone.date),
+                func.count(),
                 func.coalesce(func.sum(TrainingSessionDone.actual_distance), 0),
             )
-            .filter(
+            .where(
                 TrainingSessionDone.athlete_id.in_(athlete_ids),
-                TrainingSessionDone.date >= period_start,
-                TrainingSessionDone.date <= period_end,
+                TrainingSessionDone.date >= window_start,
+                TrainingSessionDone.date <= today,
             )
-            .one()
-        )
-        completed_total = completed_row[0] or 0
-        total_distance = float(completed_row[1] or 0)
+            .group_by("week_bucket")
+        ).all()
+    }
+
+    points: list[CoachTrendPoint] = []
+    for offset in range(weeks - 1, -1, -1):
+        period_end = period_ends[offset]
+        period_start = period_end - timedelta(days=6)
+        planned_total = planned_by_week.get(offset, 0)
+        completed_total, total_distance = completed_by_week.get(offset, (0, 0))
         compliance = (
             round(completed_total / planned_total, 2) if planned_total > 0 else None
         )
@@ -239,7 +235,7 @@ def _build_weekly_trend(
                 week_end=period_end.isoformat(),
                 planned_sessions=int(planned_total),
                 completed_sessions=int(completed_total),
-                total_distance=total_distance,
+                total_distance=float(total_distance or 0),
                 compliance_rate=compliance,
             )
         )
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from ..core.enums import UserRole
 from ..database import get_db
-from ..dependencies import ensure_athlete_access, get_current_user, require_role
+from ..dependencies import CurrentUser, ensure_athlete_access, get_current_user, require_role
 from ..models.plan import TrainingPlan, TrainingSessionPlanned
-from ..models.user import CoachAthlete, User
+from ..services.coach_links import link_coach_athlete
+from ..services.dashboard_cache import invalidate_athlete_dashboards
 from datetime import timedelta
 
 from ..schemas.plan import (
@@ -20,7 +23,7 @@ router = APIRouter(prefix="/plans", tags=["plans"])
 @router.post("", response_model=TrainingPlanRead, status_code=status.HTTP_201_CREATED)
 def create_plan(
     payload: TrainingPlanCreate,
-    current_user: User = Depends(require_role(UserRole.COACH)),
+    current_user: CurrentUser = Depends(require_role(UserRole.COACH)),
     db: Session = Depends(get_db),
 ) -> TrainingPlan:
     plan = TrainingPlan(
@@ -31,42 +34,31 @@ def create_plan(
         end_date=payload.end_date,
         notes=payload.notes,
     )
-    for session in payload.sessions:
-        plan.sessions.append(
-            TrainingSessionPlanned(
-                date=session.date,
-                type=session.type,
-                title=session.title,
-                description=session.description,
-                planned_distance=session.planned_distance,
-                planned_duration=session.planned_duration,
-                planned_rpe=session.planned_rpe,
-                notes_for_athlete=session.notes_for_athlete,
-            )
-        )
     db.add(plan)
-    link = (
-        db.query(CoachAthlete)
-        .filter(
-            CoachAthlete.coach_id == current_user.id,
-            CoachAthlete.athlete_id == payload.athlete_id,
-        )
-        .first()
+    db.flush()
+    _insert_plan_sessions(
+        db, plan, [{"plan_id": plan.id, **session.model_dump()} for session in payload.sessions]
     )
-    if not link:
-        db.add(CoachAthlete(coach_id=current_user.id, athlete_id=payload.athlete_id))
+    link_coach_athlete(db, current_user.id, payload.athlete_id)
+    # The plan and its sessions came back from RETURNING; keep them loaded
+    # past the commit instead of reloading them for the response.
+    db.expire_on_commit = False
     db.commit()
-    db.refresh(plan)
+    invalidate_athlete_dashboards(db, payload.athlete_id)
     return plan
 
 
 @router.get("/{plan_id}", response_model=TrainingPlanRead)
 def read_plan(
     plan_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> TrainingPlan:
-    plan = db.get(TrainingPlan, plan_id)
+    plan = db.execute(
+        select(TrainingPlan)
+        .options(selectinload(TrainingPlan.sessions), raiseload("*"))
+        .where(TrainingPlan.id == plan_id)
+    ).scalar_one_or_none()
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found.")
     ensure_athlete_access(plan.athlete_id, current_user=current_user, db=db)
@@ -76,31 +68,32 @@ def read_plan(
 @router.get("/athlete/{athlete_id}", response_model=list[TrainingPlanRead])
 def list_athlete_plans(
     athlete_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> list[TrainingPlan]:
     ensure_athlete_access(athlete_id, current_user=current_user, db=db)
-    return (
-        db.query(TrainingPlan)
-        .filter(TrainingPlan.athlete_id == athlete_id)
+    return db.scalars(
+        select(TrainingPlan)
+        .options(selectinload(TrainingPlan.sessions))
+        .where(TrainingPlan.athlete_id == athlete_id)
         .order_by(TrainingPlan.start_date.desc())
-        .all()
-    )
+    ).all()
 
 
 @router.post("/{plan_id}/duplicate", response_model=TrainingPlanRead, status_code=status.HTTP_201_CREATED)
 def duplicate_plan(
     plan_id: int,
     payload: TrainingPlanDuplicateRequest,
-    current_user: User = Depends(require_role(UserRole.COACH)),
+    current_user: CurrentUser = Depends(require_role(UserRole.COACH)),
     db: Session = Depends(get_db),
 ) -> TrainingPlan:
-    plan = db.get(TrainingPlan, plan_id)
+    plan = db.get(TrainingPlan, plan_id, options=[selectinload(TrainingPlan.sessions)])
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found.")
     ensure_athlete_access(plan.athlete_id, current_user=current_user, db=db)
     target_athlete_id = payload.target_athlete_id or plan.athlete_id
-    ensure_athlete_access(target_athlete_id, current_user=current_user, db=db)
+    if target_athlete_id != plan.athlete_id:
+        ensure_athlete_access(target_athlete_id, current_user=current_user, db=db)
 
     shift_days = (payload.start_date - plan.start_date).days
     end_date = payload.end_date or (plan.end_date + timedelta(days=shift_days))
@@ -113,31 +106,38 @@ def duplicate_plan(
         end_date=end_date,
         notes=payload.notes if payload.notes is not None else plan.notes,
     )
-    for session in plan.sessions:
-        new_plan.sessions.append(
-            TrainingSessionPlanned(
-                date=session.date + timedelta(days=shift_days),
-                type=session.type,
-                title=session.title,
-                description=session.description,
-                planned_distance=session.planned_distance,
-                planned_duration=session.planned_duration,
-                planned_rpe=session.planned_rpe,
-                notes_for_athlete=session.notes_for_athlete,
-            )
-        )
-
     db.add(new_plan)
-    link = (
-        db.query(CoachAthlete)
-        .filter(
-            CoachAthlete.coach_id == current_user.id,
-            CoachAthlete.athlete_id == target_athlete_id,
-        )
-        .first()
+    db.flush()
+    _insert_plan_sessions(
+        db,
+        new_plan,
+        [
+            {
+                "plan_id": new_plan.id,
+                "date": session.date + timedelta(days=shift_days),
+                "type": session.type,
+                "title": session.title,
+                "description": session.description,
+                "planned_distance": session.planned_distance,
+                "planned_duration": session.planned_duration,
+                "planned_rpe": session.planned_rpe,
+                "notes_for_athlete": session.notes_for_athlete,
+            }
+            for session in plan.sessions
+        ],
     )
-    if not link:
-        db.add(CoachAthlete(coach_id=current_user.id, athlete_id=target_athlete_id))
+    db.expire_on_commit = False
     db.commit()
-    db.refresh(new_plan)
+    invalidate_athlete_dashboards(db, target_athlete_id)
     return new_plan
+
+
+def _insert_plan_sessions(db: Session, plan: TrainingPlan, rows: list[dict]) -> None:
+    sessions = []
+    if rows:
+        statement = insert(TrainingSessionPlanned).returning(
+            TrainingSessionPlanned, sort_by_parameter_order=True
+        )
+        sessions = list(db.scalars(statement, rows))
+    # Populate the collection from RETURNING so the response needs no reload.
+    set_committed_value(plan, "sessions", sessions)
@@ -1,117 +1,150 @@
+import hashlib
+from contextlib import contextmanager
 from datetime import date
+from typing import Iterator
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import Row, Select, func, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
 
-from ..core.enums import UserRole
-from ..database import get_db
-from ..dependencies import ensure_athlete_access, get_current_user, require_role
-from ..models.plan import TrainingSessionPlanned
+from ..core.enums import SessionType, UserRole
+from ..database import get_db, upsert_insert
+from ..dependencies import CurrentUser, ensure_athlete_access, get_current_user, require_role
+from ..models.plan import TrainingPlan, TrainingSessionPlanned
 from ..models.session import TrainingSessionDone
-from ..models.user import User
 from ..schemas.session import (
+    DONE_READ_ADAPTER,
+    DONE_READ_LIST_ADAPTER,
     TrainingSessionDoneCreate,
     TrainingSessionDoneRead,
     TrainingSessionDoneUpdate,
 )
+from ..services.dashboard_cache import invalidate_athlete_dashboards
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+# Columns exposed by TrainingSessionDoneRead; listings load nothing else.
+_READ_COLUMNS = (
+    TrainingSessionDone.id,
+    TrainingSessionDone.athlete_id,
+    TrainingSessionDone.planned_session_id,
+    TrainingSessionDone.date,
+    TrainingSessionDone.actual_distance,
+    TrainingSessionDone.actual_duration,
+    TrainingSessionDone.actual_rpe,
+    TrainingSessionDone.surface,
+    TrainingSessionDone.shoes,
+    TrainingSessionDone.notes,
+)
+
 
 @router.post("/done", response_model=TrainingSessionDoneRead, status_code=status.HTTP_201_CREATED)
 def log_completed_session(
     payload: TrainingSessionDoneCreate,
-    current_user: User = Depends(require_role(UserRole.ATHLETE)),
+    current_user: CurrentUser = Depends(require_role(UserRole.ATHLETE)),
     db: Session = Depends(get_db),
 ) -> TrainingSessionDone:
-    if payload.planned_session_id:
-        planned = db.get(TrainingSessionPlanned, payload.planned_session_id)
-        if not planned:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Planned session not found.")
-        if planned.plan.athlete_id != current_user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your session.")
-        existing_for_planned = (
-            db.query(TrainingSessionDone)
-            .filter(
-                TrainingSessionDone.athlete_id == current_user.id,
-                TrainingSessionDone.planned_session_id == payload.planned_session_id,
-            )
-            .first()
-        )
-        if existing_for_planned:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="You already logged this planned session.",
-            )
-    else:
-        _assert_no_manual_duplicate(db, current_user.id, payload.date)
-    done = TrainingSessionDone(
-        athlete_id=current_user.id,
-        planned_session_id=payload.planned_session_id,
-        date=payload.date,
-        actual_distance=payload.actual_distance,
-        actual_duration=payload.actual_duration,
-        actual_rpe=payload.actual_rpe,
-        surface=payload.surface,
-        shoes=payload.shoes,
-        notes=payload.notes,
+    planned_type = (
+        _planned_session_type(db, payload.planned_session_id, current_user.id)
+        if payload.planned_session_id
+        else None
     )
-    db.add(done)
+    # Either partial unique index turns a duplicate into a skipped insert, so
+    # the write and the duplicate check are one statement.
+    done = db.scalars(
+        upsert_insert(db, TrainingSessionDone)
+        .values(
+            athlete_id=current_user.id,
+            session_type=planned_type,
+            **payload.model_dump(),
+        )
+        .on_conflict_do_nothing()
+        .returning(TrainingSessionDone)
+    ).one_or_none()
+    if done is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=_duplicate_detail(planned=bool(payload.planned_session_id)),
+        )
+    # The row came back from RETURNING; keep it loaded past the commit.
+    db.expire_on_commit = False
     db.commit()
-    db.refresh(done)
+    invalidate_athlete_dashboards(db, done.athlete_id)
     return done
 
 
 @router.get("/done/me", response_model=list[TrainingSessionDoneRead])
 def list_my_sessions(
-    current_user: User = Depends(require_role(UserRole.ATHLETE)),
+    request: Request,
+    current_user: CurrentUser = Depends(require_role(UserRole.ATHLETE)),
     db: Session = Depends(get_db),
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     planned_session_id: int | None = Query(default=None),
-) -> list[TrainingSessionDone]:
-    return _query_sessions(
-        db,
+    before: date | None = Query(default=None),
+    before_id: int | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+) -> Response:
+    page = _sessions_page(
         athlete_id=current_user.id,
         start_date=start_date,
         end_date=end_date,
         planned_session_id=planned_session_id,
+        before=before,
+        before_id=before_id,
+        limit=limit,
     )
+    return _sessions_response(db, request, page, limit)
 
 
 @router.get("/done/athlete/{athlete_id}", response_model=list[TrainingSessionDoneRead])
 def list_athlete_sessions(
     athlete_id: int,
-    current_user: User = Depends(require_role(UserRole.COACH)),
+    request: Request,
+    current_user: CurrentUser = Depends(require_role(UserRole.COACH)),
     db: Session = Depends(get_db),
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     planned_session_id: int | None = Query(default=None),
-) -> list[TrainingSessionDone]:
+    before: date | None = Query(default=None),
+    before_id: int | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+) -> Response:
     ensure_athlete_access(athlete_id, current_user=current_user, db=db)
-    return _query_sessions(
-        db,
+    page = _sessions_page(
         athlete_id=athlete_id,
         start_date=start_date,
         end_date=end_date,
         planned_session_id=planned_session_id,
+        before=before,
+        before_id=before_id,
+        limit=limit,
     )
+    return _sessions_response(db, request, page, limit)
 
 
 @router.get("/done/{session_id}", response_model=TrainingSessionDoneRead)
 def get_completed_session(
     session_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> TrainingSessionDone:
-    return _get_session_for_edit(session_id, current_user, db)
+) -> Response:
+    session = _get_session_for_edit(session_id, current_user, db)
+    etag = f'W/"{session.id}-{session.updated_at.isoformat()}"'
+    headers = _validator_headers(etag)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body = DONE_READ_ADAPTER.dump_json(DONE_READ_ADAPTER.validate_python(session))
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.put("/done/{session_id}", response_model=TrainingSessionDoneRead)
 def update_session(
     session_id: int,
     payload: TrainingSessionDoneUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> TrainingSessionDone:
     session = _get_session_for_edit(session_id, current_user, db)
@@ -120,42 +153,43 @@ def update_session(
         return session
 
     new_planned_id = updates.get("planned_session_id", session.planned_session_id)
-    new_date = updates.get("date", session.date)
 
-    if new_planned_id:
-        planned = db.get(TrainingSessionPlanned, new_planned_id)
-        if not planned:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Planned session not found.")
-        if planned.plan.athlete_id != session.athlete_id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your session.")
-        _assert_no_duplicate_planned(db, session.athlete_id, new_planned_id, exclude_session_id=session.id)
+    if new_planned_id == session.planned_session_id:
+        # Ownership was checked and the type copied when the link was made.
+        planned_type = session.session_type
+    elif new_planned_id:
+        planned_type = _planned_session_type(db, new_planned_id, session.athlete_id)
     else:
-        _assert_no_manual_duplicate(
-            db,
-            session.athlete_id,
-            new_date,
-            exclude_session_id=session.id,
-        )
+        planned_type = None
 
-    for field, value in updates.items():
-        setattr(session, field, value)
-    db.commit()
-    db.refresh(session)
+    # One UPDATE ... RETURNING writes the row and refreshes the loaded instance.
+    with _duplicate_guard(db, planned=bool(new_planned_id)):
+        session = db.scalars(
+            update(TrainingSessionDone)
+            .where(TrainingSessionDone.id == session.id)
+            .values(**updates, session_type=planned_type)
+            .returning(TrainingSessionDone)
+        ).one()
+        db.expire_on_commit = False
+        db.commit()
+    invalidate_athlete_dashboards(db, session.athlete_id)
     return session
 
 
 @router.delete("/done/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_session(
     session_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> None:
     session = _get_session_for_edit(session_id, current_user, db)
+    athlete_id = session.athlete_id
     db.delete(session)
     db.commit()
+    invalidate_athlete_dashboards(db, athlete_id)
 
 
-def _get_session_for_edit(session_id: int, current_user: User, db: Session) -> TrainingSessionDone:
+def _get_session_for_edit(session_id: int, current_user: CurrentUser, db: Session) -> TrainingSessionDone:
     session = db.get(TrainingSessionDone, session_id)
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
@@ -167,65 +201,113 @@ def _get_session_for_edit(session_id: int, current_user: User, db: Session) -> T
     return session
 
 
-def _query_sessions(
-    db: Session,
+def _sessions_page(
     athlete_id: int,
     start_date: date | None,
     end_date: date | None,
     planned_session_id: int | None = None,
-) -> list[TrainingSessionDone]:
-    query = db.query(TrainingSessionDone).filter(TrainingSessionDone.athlete_id == athlete_id)
+    before: date | None = None,
+    before_id: int | None = None,
+    limit: int = 50,
+) -> Select:
+    stmt = select(TrainingSessionDone).where(TrainingSessionDone.athlete_id == athlete_id)
     if start_date:
-        query = query.filter(TrainingSessionDone.date >= start_date)
+        stmt = stmt.where(TrainingSessionDone.date >= start_date)
     if end_date:
-        query = query.filter(TrainingSessionDone.date <= end_date)
+        stmt = stmt.where(TrainingSessionDone.date <= end_date)
     if planned_session_id:
-        query = query.filter(TrainingSessionDone.planned_session_id == planned_session_id)
-    return query.order_by(TrainingSessionDone.date.desc()).all()
+        stmt = stmt.where(TrainingSessionDone.planned_session_id == planned_session_id)
+    # Keyset pagination: resume strictly after the (date, id) of the previous
+    # page's last row so the seek stays on the (athlete_id, date) index.
+    if before and before_id:
+        stmt = stmt.where(tuple_(TrainingSessionDone.date, TrainingSessionDone.id) < (before, before_id))
+    elif before:
+        stmt = stmt.where(TrainingSessionDone.date < before)
+    return stmt.order_by(TrainingSessionDone.date.desc(), TrainingSessionDone.id.desc()).limit(limit)
 
 
-def _assert_no_manual_duplicate(
-    db: Session,
-    athlete_id: int,
-    session_date: date,
-    exclude_session_id: int | None = None,
-) -> None:
-    query = (
-        db.query(TrainingSessionDone)
-        .filter(
-            TrainingSessionDone.athlete_id == athlete_id,
-            TrainingSessionDone.date == session_date,
-            TrainingSessionDone.planned_session_id.is_(None),
-        )
-    )
-    if exclude_session_id:
-        query = query.filter(TrainingSessionDone.id != exclude_session_id)
-    duplicate = query.first()
-    if duplicate:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="A session for this date already exists.",
-        )
+def _page_etag(db: Session, page: Select) -> tuple[str, int]:
+    # The id sum tracks which rows are on the page and updated_at tracks edits,
+    # so the fingerprint changes whenever the page body would. It is hashed
+    # into a compact token: raw timestamps render with spaces on some drivers.
+    rows = page.with_only_columns(TrainingSessionDone.id, TrainingSessionDone.updated_at).subquery()
+    count, id_sum, last_update = db.execute(
+        select(func.count(), func.sum(rows.c.id), func.max(rows.c.updated_at))
+    ).one()
+    digest = hashlib.blake2b(f"{count}-{id_sum}-{last_update}".encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"', count
 
 
-def _assert_no_duplicate_planned(
-    db: Session,
-    athlete_id: int,
-    planned_session_id: int,
-    exclude_session_id: int | None = None,
-) -> None:
-    query = (
-        db.query(TrainingSessionDone)
-        .filter(
-            TrainingSessionDone.athlete_id == athlete_id,
-            TrainingSessionDone.planned_session_id == planned_session_id,
-        )
-    )
-    if exclude_session_id:
-        query = query.filter(TrainingSessionDone.id != exclude_session_id)
-    duplicate = query.first()
-    if duplicate:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You already logged this planned session.",
-        )
+def _cursor_headers(last: TrainingSessionDone | Row) -> dict[str, str]:
+    return {"X-Next-Before": last.date.isoformat(), "X-Next-Before-Id": str(last.id)}
+
+
+def _validator_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "private, max-age=10, must-revalidate"}
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored, and the
+    # header may carry a comma-separated list of tags or "*".
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in if_none_match.split(","))
+
+
+def _sessions_response(db: Session, request: Request, page: Select, limit: int) -> Response:
+    etag, count = _page_etag(db, page)
+    headers = _validator_headers(etag)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        if count == limit:
+            # A revalidated page still needs its cursor to fetch the next one.
+            last = db.execute(
+                page.with_only_columns(TrainingSessionDone.date, TrainingSessionDone.id).offset(limit - 1)
+            ).first()
+            if last:
+                headers.update(_cursor_headers(last))
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    sessions = db.scalars(page.options(load_only(*_READ_COLUMNS))).all()
+    # Return the connection to the pool before the response is encoded,
+    # keeping the loaded rows readable instead of expiring them.
+    db.expire_on_commit = False
+    db.commit()
+    # Validate and encode in one pydantic-core pass instead of FastAPI's
+    # validate, jsonable_encoder and json.dumps round.
+    body = DONE_READ_LIST_ADAPTER.dump_json(DONE_READ_LIST_ADAPTER.validate_python(sessions))
+    if len(sessions) == limit:
+        headers.update(_cursor_headers(sessions[-1]))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _planned_session_type(db: Session, planned_session_id: int, athlete_id: int) -> SessionType:
+    # Ownership and the type to copy come back in one narrow row.
+    planned = db.execute(
+        select(TrainingPlan.athlete_id, TrainingSessionPlanned.type)
+        .join(TrainingPlan, TrainingPlan.id == TrainingSessionPlanned.plan_id)
+        .where(TrainingSessionPlanned.id == planned_session_id)
+    ).first()
+    if not planned:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Planned session not found.")
+    if planned.athlete_id != athlete_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your session.")
+    return planned.type
+
+
+@contextmanager
+def _duplicate_guard(db: Session, planned: bool) -> Iterator[None]:
+    # The partial unique indexes on training_sessions_done enforce one manual
+    # session per day and one log per planned session.
+    try:
+        yield
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=_duplicate_detail(planned))
+
+
+def _duplicate_detail(planned: bool) -> str:
+    if planned:
+        return "You already logged this planned session."
+    return "A session for this date already exists."
@@ -1,7 +1,7 @@
 from datetime import date
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 class TrainingSessionDoneBase(BaseModel):
@@ -35,3 +35,9 @@ class TrainingSessionDoneRead(TrainingSessionDoneBase):
     athlete_id: int
 
     model_config = {"from_attributes": True}
+
+
+# Built once at import so hot endpoints can validate and encode without
+# rebuilding a serializer per response.
+DONE_READ_ADAPTER = TypeAdapter(TrainingSessionDoneRead)
+DONE_READ_LIST_ADAPTER = TypeAdapter(list[TrainingSessionDoneRead])
@@ -2,38 +2,40 @@ from __future__ import annotations
 
 from datetime import date, timedelta
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.enums import UserRole
 from app.core.security import get_password_hash
-from app.database import SessionLocal
+from app.database import SessionLocal, bulk_insert
 from app.models.plan import TrainingPlan, TrainingSessionPlanned
 from app.models.session import TrainingSessionDone
-from app.models.user import AthleteProfile, CoachAthlete, User
+from app.models.user import AthleteProfile, User
+from app.services.coach_links import link_coach_athlete
 
 
-def ensure_user(
+def ensure_users(
     db: Session,
-    *,
-    name: str,
-    email: str,
-    role: UserRole,
-    password: str,
-) -> User:
-    user = db.query(User).filter_by(email=email).first()
-    if user:
-        return user
-    user = User(
-        name=name,
-        email=email,
-        role=role,
-        password_hash=get_password_hash(password),
-    )
-    db.add(user)
-    db.flush()
-    if role == UserRole.ATHLETE and not db.get(AthleteProfile, user.id):
-        db.add(AthleteProfile(user_id=user.id))
-    return user
+    users: list[tuple[str, str, UserRole, str]],
+) -> dict[str, User]:
+    """Return users by email, creating the (name, email, role, password) entries that are missing."""
+    emails = [email for _, email, _, _ in users]
+    existing = {user.email: user for user in db.scalars(select(User).where(User.email.in_(emails)))}
+    for name, email, role, password in users:
+        if email in existing:
+            continue
+        user = User(
+            name=name,
+            email=email,
+            role=role,
+            password_hash=get_password_hash(password),
+        )
+        db.add(user)
+        db.flush()
+        if role == UserRole.ATHLETE:
+            db.add(AthleteProfile(user_id=user.id))
+        existing[email] = user
+    return existing
 
 
 def ensure_plan_with_sessions(
@@ -63,56 +65,54 @@ def ensure_plan_with_sessions(
         end_date=start + timedelta(days=42),
         notes="Plan de muestra generado por seed.",
     )
-    plan.sessions = [
-        TrainingSessionPlanned(
-            date=start,
-            type="RODAJE",
-            title="Easy 30",
-            description="30 minutos Z2",
-            planned_distance=6,
-            planned_duration=30,
-            planned_rpe=4,
-        ),
-        TrainingSessionPlanned(
-            date=start + timedelta(days=2),
-            type="PASADAS",
-            title="8x400",
-            description="8 repeticiones a ritmo controlado",
-            planned_distance=10,
-            planned_duration=55,
-            planned_rpe=7,
-        ),
-        TrainingSessionPlanned(
-            date=start + timedelta(days=4),
-            type="FUERZA",
-            title="Circuito fuerza",
-            planned_duration=45,
-            planned_rpe=6,
-        ),
-    ]
     db.add(plan)
     db.flush()
-
-    link = (
-        db.query(CoachAthlete)
-        .filter(
-            CoachAthlete.coach_id == coach.id,
-            CoachAthlete.athlete_id == athlete.id,
-        )
-        .first()
+    bulk_insert(
+        db,
+        TrainingSessionPlanned,
+        [
+            {
+                "plan_id": plan.id,
+                "date": start,
+                "type": "RODAJE",
+                "title": "Easy 30",
+                "description": "30 minutos Z2",
+                "planned_distance": 6,
+                "planned_duration": 30,
+                "planned_rpe": 4,
+            },
+            {
+                "plan_id": plan.id,
+                "date": start + timedelta(days=2),
+                "type": "PASADAS",
+                "title": "8x400",
+                "description": "8 repeticiones a ritmo controlado",
+                "planned_distance": 10,
+                "planned_duration": 55,
+                "planned_rpe": 7,
+            },
+            {
+                "plan_id": plan.id,
+                "date": start + timedelta(days=4),
+                "type": "FUERZA",
+                "title": "Circuito fuerza",
+                "planned_duration": 45,
+                "planned_rpe": 6,
+            },
+        ],
     )
-    if not link:
-        db.add(CoachAthlete(coach_id=coach.id, athlete_id=athlete.id))
+
+    link_coach_athlete(db, coach.id, athlete.id)
 
     return plan
 
 
-def seed_completed_session(db: Session, *, athlete: User, planned_session_id: int) -> None:
+def seed_completed_session(db: Session, *, athlete: User, planned_session: TrainingSessionPlanned) -> None:
     existing = (
         db.query(TrainingSessionDone)
         .filter(
             TrainingSessionDone.athlete_id == athlete.id,
-            TrainingSessionDone.planned_session_id == planned_session_id,
+            TrainingSessionDone.planned_session_id == planned_session.id,
         )
         .first()
     )
@@ -121,7 +121,8 @@ def seed_completed_session(db: Session, *, athlete: User, planned_session_id: in
 
     session = TrainingSessionDone(
         athlete_id=athlete.id,
-        planned_session_id=planned_session_id,
+        planned_session_id=planned_session.id,
+        session_type=planned_session.type,
         date=date.today() - timedelta(days=1),
         actual_distance=6.2,
         actual_duration=32,
@@ -134,23 +135,18 @@ def seed_completed_session(db: Session, *, athlete: User, planned_session_id: in
 def main() -> None:
     db = SessionLocal()
     try:
-        athlete = ensure_user(
-            db,
-            name="Athlete Demo",
-            email="athlete@example.com",
-            role=UserRole.ATHLETE,
-            password="secret123",
-        )
-        coach = ensure_user(
+        users = ensure_users(
             db,
-            name="Coach Demo",
-            email="coach@example.com",
-            role=UserRole.COACH,
-            password="secret123",
+            [
+                ("Athlete Demo", "athlete@example.com", UserRole.ATHLETE, "secret123"),
+                ("Coach Demo", "coach@example.com", UserRole.COACH, "secret123"),
+            ],
         )
+        athlete = users["athlete@example.com"]
+        coach = users["coach@example.com"]
         plan = ensure_plan_with_sessions(db, athlete=athlete, coach=coach)
         if plan.sessions:
-            seed_completed_session(db, athlete=athlete, planned_session_id=plan.sessions[0].id)
+            seed_completed_session(db, athlete=athlete, planned_session=plan.sessions[0])
         db.commit()
         print("✅ Seed data ready. Users: athlete@example.com / coach@example.com (pass: secret123)")
     except Exception:
@@ -0,0 +1,13 @@
+from sqlalchemy.orm import Session
+
+from ..database import upsert_insert
+from ..models.user import CoachAthlete
+
+
+def link_coach_athlete(db: Session, coach_id: int, athlete_id: int) -> None:
+    """Create the coach/athlete link unless it already exists, in one statement."""
+    db.execute(
+        upsert_insert(db, CoachAthlete)
+        .values(coach_id=coach_id, athlete_id=athlete_id)
+        .on_conflict_do_nothing(index_elements=["coach_id", "athlete_id"])
+    )
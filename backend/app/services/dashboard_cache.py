@@ -0,0 +1,41 @@
+import threading
+from datetime import date
+from typing import Any, Callable, Iterable
+
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.user import CoachAthlete
+
+DASHBOARD_CACHE_SECONDS = 30
+
+# Coach dashboards are polled far more often than the underlying data changes.
+# Writes that affect a coach's numbers drop that coach's entries; the TTL bounds
+# staleness for writes made through other workers.
+_dashboard_cache: TTLCache = TTLCache(maxsize=10_000, ttl=DASHBOARD_CACHE_SECONDS)
+_dashboard_lock = threading.Lock()
+
+
+def cached_dashboard(coach_id: int, view: str, build: Callable[[], Any]) -> Any:
+    key = (coach_id, view, date.today())
+    with _dashboard_lock:
+        value = _dashboard_cache.get(key)
+    if value is None:
+        value = build()
+        with _dashboard_lock:
+            _dashboard_cache[key] = value
+    return value
+
+
+def invalidate_coach_dashboards(coach_ids: Iterable[int]) -> None:
+    coach_ids = set(coach_ids)
+    with _dashboard_lock:
+        for key in [key for key in _dashboard_cache if key[0] in coach_ids]:
+            _dashboard_cache.pop(key, None)
+
+
+def invalidate_athlete_dashboards(db: Session, athlete_id: int) -> None:
+    invalidate_coach_dashboards(
+        db.scalars(select(CoachAthlete.coach_id).where(CoachAthlete.athlete_id == athlete_id))
+    )
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any, Mapping, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models.external_activity import ExternalActivity
+
+COPY_THRESHOLD = 100
+_COPY_COLUMNS = ("athlete_id", "source", "external_id", "payload", "received_at")
+
+
+def bulk_insert_external_activities(db: Session, rows: Sequence[Mapping[str, Any]]) -> None:
+    """Insert external activities, using COPY for large batches on PostgreSQL."""
+    if not rows:
+        return
+    received_at = datetime.utcnow()
+    records = [
+        (
+            row["athlete_id"],
+            row["source"],
+            row["external_id"],
+            row.get("payload"),
+            row.get("received_at") or received_at,
+        )
+        for row in rows
+    ]
+    connection = db.connection()
+    if len(records) >= COPY_THRESHOLD and connection.dialect.driver == "psycopg":
+        copy_sql = f"COPY {ExternalActivity.__tablename__} ({', '.join(_COPY_COLUMNS)}) FROM STDIN"
+        with connection.connection.cursor() as cursor, cursor.copy(copy_sql) as copy:
+            for record in records:
+                copy.write_row(record)
+        return
+    db.execute(insert(ExternalActivity), [dict(zip(_COPY_COLUMNS, record)) for record in records])
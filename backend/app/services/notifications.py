@@ -1,47 +1,46 @@
 import logging
 import smtplib
+import threading
 from email.message import EmailMessage
 
 from ..core.config import get_settings
-from ..models.user import CoachInvite
 
 logger = logging.getLogger(__name__)
 
 
-def send_invite_email(invite: CoachInvite) -> None:
+def send_invite_email(coach_name: str, athlete_email: str) -> None:
     subject = "Nueva invitación de entrenador"
     cta = _build_cta_url("/register")
     body = (
-        f"Hola!\n\n{invite.coach.name} te invitó a entrenar en la plataforma Athletics.\n"
+        f"Hola!\n\n{coach_name} te invitó a entrenar en la plataforma Athletics.\n"
         f"Ingresa con tu cuenta o regístrate usando este correo para aceptar la invitación.\n\n"
     )
     if cta:
         body += f"Comienza aquí: {cta}\n\n"
-    _send_email(recipient=invite.athlete_email, subject=subject, body=body)
+    _send_email(recipient=athlete_email, subject=subject, body=body)
 
 
-def send_invite_reminder(invite: CoachInvite) -> None:
+def send_invite_reminder(coach_name: str, athlete_email: str) -> None:
     subject = "Recordatorio: tienes una invitación pendiente"
     cta = _build_cta_url("/login")
     body = (
-        f"Hola! {invite.coach.name} está esperando que confirmes tu invitación en Athletics.\n"
+        f"Hola! {coach_name} está esperando que confirmes tu invitación en Athletics.\n"
         f"Ingresa para aceptarla y sincronizar tus planes.\n"
     )
     if cta:
         body += f"Accede aquí: {cta}\n"
-    _send_email(recipient=invite.athlete_email, subject=subject, body=body)
+    _send_email(recipient=athlete_email, subject=subject, body=body)
 
 
-def send_invite_accepted(invite: CoachInvite) -> None:
-    if not invite.coach or not invite.coach.email:
+def send_invite_accepted(coach_email: str | None, athlete_name: str) -> None:
+    if not coach_email:
         return
     subject = "Un atleta aceptó tu invitación"
-    athlete_name = invite.athlete.name if invite.athlete else invite.athlete_email
     body = (
         f"{athlete_name} aceptó tu invitación en Athletics.\n"
         f"Ya puedes asignarle planes y comenzar a registrar su progreso."
     )
-    _send_email(recipient=invite.coach.email, subject=subject, body=body)
+    _send_email(recipient=coach_email, subject=subject, body=body)
 
 
 def _build_cta_url(path: str) -> str | None:
@@ -64,11 +63,58 @@ def _send_email(recipient: str, subject: str, body: str) -> None:
     message.set_content(body)
 
     try:
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as smtp:
-            if settings.smtp_starttls:
-                smtp.starttls()
-            if settings.smtp_username and settings.smtp_password:
-                smtp.login(settings.smtp_username, settings.smtp_password)
-            smtp.send_message(message)
+        with _smtp_lock:
+            _deliver(message)
     except Exception as exc:  # pragma: no cover - network failures
         logger.error("Failed to send email to %s: %s", recipient, exc)
+
+
+# One authenticated connection is reused across messages so bursts of invites
+# don't repeat the TCP, STARTTLS and AUTH handshakes; callers hold _smtp_lock.
+_smtp: smtplib.SMTP | None = None
+_smtp_lock = threading.Lock()
+
+
+def _deliver(message: EmailMessage) -> None:  # pragma: no cover - network I/O
+    global _smtp
+    for attempt in range(2):
+        if _smtp is None:
+            _smtp = _connect()
+        try:
+            _smtp.send_message(message)
+            return
+        except smtplib.SMTPServerDisconnected:
+            # Servers drop idle connections; reconnect once and retry.
+            _smtp.close()
+            _smtp = None
+            if attempt:
+                raise
+        except Exception:
+            _close_smtp()
+            raise
+
+
+def _connect() -> smtplib.SMTP:  # pragma: no cover - network I/O
+    settings = get_settings()
+    smtp = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout)
+    try:
+        if settings.smtp_starttls:
+            smtp.starttls()
+        if settings.smtp_username and settings.smtp_password:
+            smtp.login(settings.smtp_username, settings.smtp_password)
+    except Exception:
+        # Don't leak the socket of a half-finished handshake; _smtp is only
+        # set once the connection is ready.
+        smtp.close()
+        raise
+    return smtp
+
+
+def _close_smtp() -> None:  # pragma: no cover - network I/O
+    global _smtp
+    if _smtp is not None:
+        try:
+            _smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        _smtp = None
@@ -1,18 +1,38 @@
 import os
+from dataclasses import dataclass, field
+from importlib.util import find_spec
+from typing import NamedTuple
 
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# Every pytest-xdist worker is its own process with a private in-memory
+# database, schema and user pool, so `pytest -n auto` works with the default
+# `load` distribution. `--dist=loadfile` would put this single test module on
+# one worker.
 os.environ["DATABASE_URL"] = "sqlite+pysqlite:///:memory:"
 os.environ["JWT_SECRET_KEY"] = "test-secret"
 os.environ["JWT_ALGORITHM"] = "HS256"
 os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"] = "60"
+# bcrypt's minimum cost; hashing stays real but no longer dominates the suite.
+os.environ["BCRYPT_ROUNDS"] = "4"
 
-from app.database import Base, get_db  # noqa: E402
+from app.core.enums import UserRole  # noqa: E402
+from app.core.security import create_access_token, get_password_hash  # noqa: E402
+from app.database import Base, bulk_insert, get_db  # noqa: E402
+from app.dependencies import _coach_athletes_cache, _current_user_cache  # noqa: E402
+from app.routers.auth import _recently_attached  # noqa: E402
+from app.services.dashboard_cache import _dashboard_cache  # noqa: E402
 from app.main import app  # noqa: E402
+from app.models.session import TrainingSessionDone  # noqa: E402
+from app.models.user import AthleteProfile, User  # noqa: E402
+
+POOL_ATHLETES = 8
+POOL_COACHES = 4
 
 engine = create_engine(
     os.environ["DATABASE_URL"],
@@ -30,19 +50,155 @@ def override_get_db():
         db.close()
 
 
-def reset_database() -> None:
-    Base.metadata.drop_all(bind=engine)
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transaction_handling(dbapi_connection, _record) -> None:
+    # pysqlite's implicit BEGIN breaks SAVEPOINT; let SQLAlchemy emit it instead.
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(connection) -> None:
+    connection.exec_driver_sql("BEGIN")
+
+
+def reset_caches() -> None:
+    _coach_athletes_cache.clear()
+    _current_user_cache.clear()
+    _recently_attached.clear()
+    _dashboard_cache.clear()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _create_schema():
     Base.metadata.create_all(bind=engine)
 
 
+@dataclass
+class UserPool:
+    """Hands out pre-registered users; each test starts again from the first one."""
+
+    athletes: list[dict]
+    coaches: list[dict]
+    _taken: dict[str, int] = field(default_factory=lambda: {"athletes": 0, "coaches": 0})
+
+    def _take(self, kind: str) -> dict:
+        index = self._taken[kind]
+        self._taken[kind] = index + 1
+        return getattr(self, kind)[index]
+
+    def take_athlete(self) -> dict:
+        return self._take("athletes")
+
+    def take_coach(self) -> dict:
+        return self._take("coaches")
+
+
+@pytest.fixture(scope="session")
+def _user_catalog(_create_schema):
+    # Committed before any per-test transaction opens, so every test sees
+    # these users and none of them pays for registration or a password hash.
+    password_hash = get_password_hash("password123")
+    specs = [(UserRole.ATHLETE, f"Pool Athlete {n}", f"pool-athlete-{n}@example.com") for n in range(POOL_ATHLETES)]
+    specs += [(UserRole.COACH, f"Pool Coach {n}", f"pool-coach-{n}@example.com") for n in range(POOL_COACHES)]
+    with Session(engine) as db:
+        users = [User(name=name, email=email, role=role, password_hash=password_hash) for role, name, email in specs]
+        db.add_all(users)
+        db.flush()
+        db.add_all(AthleteProfile(user_id=user.id) for user in users if user.role == UserRole.ATHLETE)
+        db.commit()
+        catalog = {"athletes": [], "coaches": []}
+        for user in users:
+            entry = {
+                "id": user.id,
+                "name": user.name,
+                "email": user.email,
+                "role": user.role.value,
+                "token": create_access_token({"sub": str(user.id), "role": user.role.value}),
+            }
+            catalog["athletes" if user.role == UserRole.ATHLETE else "coaches"].append(entry)
+    return catalog
+
+
+@pytest.fixture()
+def user_pool(_user_catalog) -> UserPool:
+    return UserPool(athletes=_user_catalog["athletes"], coaches=_user_catalog["coaches"])
+
+
+class CoachAthletePair(NamedTuple):
+    athlete: dict
+    athlete_token: str
+    coach_token: str
+    coach: dict
+
+
+@pytest.fixture()
+def coach_athlete_pair(user_pool) -> CoachAthletePair:
+    athlete = user_pool.take_athlete()
+    coach = user_pool.take_coach()
+    return CoachAthletePair(athlete, athlete["token"], coach["token"], coach)
+
+
 @pytest.fixture(autouse=True)
 def _prepare_db():
-    reset_database()
+    # Each test runs inside one outer transaction; the app's commits and
+    # rollbacks only touch savepoints, and teardown discards everything.
+    connection = engine.connect()
+    transaction = connection.begin()
+    TestingSessionLocal.configure(bind=connection, join_transaction_mode="create_savepoint")
+    reset_caches()
+    yield
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture()
+def db_session():
+    with TestingSessionLocal() as db:
+        yield db
 
 
 @pytest.fixture()
-def client():
+def seed_sessions():
+    """Insert completed sessions straight into the test transaction, skipping the HTTP layer."""
+
+    def seed(athlete_id: int, rows: list[dict]) -> None:
+        with TestingSessionLocal() as db:
+            bulk_insert(db, TrainingSessionDone, [{"athlete_id": athlete_id, **row} for row in rows])
+            db.commit()
+
+    return seed
+
+
+@pytest.fixture()
+def register_and_login(client):
+    """Register through the real endpoint, then mint the token in-process instead of calling /auth/login."""
+
+    async def register(name: str, email: str, role: str, password: str = "password123") -> tuple[dict, str]:
+        response = await client.post(
+            "/auth/register",
+            content=orjson.dumps({"name": name, "email": email, "role": role, "password": password}),
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 201, response.text
+        user = orjson.loads(response.content)
+        return user, create_access_token({"sub": str(user["id"]), "role": user["role"]})
+
+    return register
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    # uvloop ships with uvicorn[standard]; fall back to the stock loop where it is missing.
+    return "asyncio", {"use_uvloop": find_spec("uvloop") is not None}
+
+
+@pytest.fixture(scope="session")
+async def client():
+    # Requests are dispatched in-process on the test's event loop, with one
+    # lifespan startup/shutdown for the whole run; the override is in place
+    # before the app starts serving.
     app.dependency_overrides[get_db] = override_get_db
-    client = TestClient(app)
-    yield client
+    transport = ASGITransport(app=app)
+    async with app.router.lifespan_context(app), AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
     app.dependency_overrides.clear()
@@ -1,89 +1,151 @@
-from datetime import date, timedelta
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from logging.handlers import QueueHandler
+from types import MappingProxyType
+from typing import Mapping
 
-from fastapi.testclient import TestClient
+import orjson
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
 
+from app.core.security import create_access_token
+from app.models.external_activity import ExternalActivity
+from app.models.user import CoachInvite
+from app.services.ingest import COPY_THRESHOLD, bulk_insert_external_activities
 
-def register_user(client: TestClient, name: str, email: str, role: str, password: str = "password123"):
-    response = client.post(
+
+pytestmark = pytest.mark.anyio
+
+
+async def register_user(client: AsyncClient, name: str, email: str, role: str, password: str = "password123"):
+    response = await post_json(
+        client,
         "/auth/register",
-        json={"name": name, "email": email, "role": role, "password": password},
+        payload={"name": name, "email": email, "role": role, "password": password},
     )
     assert response.status_code == 201, response.text
-    return response.json()
+    return orjson.loads(response.content)
 
 
-def login(client: TestClient, email: str, password: str = "password123") -> str:
-    response = client.post(
+async def login(client: AsyncClient, email: str, password: str = "password123") -> str:
+    response = await client.post(
         "/auth/login",
         params={"email": email, "password": password},
     )
     assert response.status_code == 200, response.text
-    return response.json()["access_token"]
+    return orjson.loads(response.content)["access_token"]
+
+
+@lru_cache(maxsize=64)
+def auth_header(token: str) -> Mapping[str, str]:
+    # Read-only so the cached header can be shared between calls safely.
+    return MappingProxyType({"Authorization": f"Bearer {token}"})
+
+
+async def post_json(client: AsyncClient, url: str, payload, headers: Mapping[str, str] | None = None):
+    return await client.post(
+        url,
+        content=orjson.dumps(payload),
+        headers={**(headers or {}), "Content-Type": "application/json"},
+    )
 
 
-def auth_header(token: str) -> dict[str, str]:
-    return {"Authorization": f"Bearer {token}"}
+# (day offset from the plan start, session fields) for the default plan.
+_DEFAULT_SESSION_TEMPLATES = (
+    (
+        0,
+        {
+            "type": "RODAJE",
+            "title": "Easy Run",
+            "description": "30 minutos Z2",
+            "planned_distance": 6.0,
+            "planned_duration": 30,
+            "planned_rpe": 4,
+            "notes_for_athlete": "Respirar nasal",
+        },
+    ),
+    (
+        2,
+        {
+            "type": "PASADAS",
+            "title": "8x400",
+            "planned_distance": 10.0,
+            "planned_duration": 60,
+            "planned_rpe": 7,
+        },
+    ),
+)
 
 
-def create_plan_for_tests(
-    client: TestClient,
+def _plan_body(athlete_id: int, start: date, sessions: list[dict]) -> bytes:
+    return orjson.dumps(
+        {
+            "athlete_id": athlete_id,
+            "name": "10K Base",
+            "goal_type": "10K",
+            "start_date": start,
+            "end_date": start + timedelta(days=30),
+            "notes": "Fase base",
+            "sessions": sessions,
+        }
+    )
+
+
+@lru_cache
+def _default_plan_body(athlete_id: int, start: date) -> bytes:
+    sessions = [{"date": start + timedelta(days=offset), **fields} for offset, fields in _DEFAULT_SESSION_TEMPLATES]
+    return _plan_body(athlete_id, start, sessions)
+
+
+@dataclass(slots=True, frozen=True)
+class AthleteWeekMetrics:
+    """One /dashboard/coach/me row; unexpected or missing fields fail construction."""
+
+    athlete_id: int
+    athlete_name: str
+    planned_sessions_week: int
+    completed_sessions_week: int
+    completed_distance_week: float
+    compliance_rate: float | None
+    pending_sessions_today: int
+
+
+# (date, distance) rows seeded around the one logged session in the date-range filter test.
+_FILTER_SEEDED_SESSIONS = ((date(2024, 1, 5), 5), (date(2024, 2, 15), 12))
+# (days ago, distance, duration, rpe) of the manual sessions in the history summary test.
+_HISTORY_MANUAL_SESSIONS = ((2, 8, 45, 6), (10, 5, 30, 5), (40, 12, 60, 6))
+
+
+async def create_plan_for_tests(
+    client: AsyncClient,
     coach_token: str,
     athlete_id: int,
     start: date,
     sessions: list[dict] | None = None,
 ) -> dict:
-    payload = {
-        "athlete_id": athlete_id,
-        "name": "10K Base",
-        "goal_type": "10K",
-        "start_date": start.isoformat(),
-        "end_date": (start + timedelta(days=30)).isoformat(),
-        "notes": "Fase base",
-        "sessions": sessions
-        or [
-            {
-                "date": start.isoformat(),
-                "type": "RODAJE",
-                "title": "Easy Run",
-                "description": "30 minutos Z2",
-                "planned_distance": 6.0,
-                "planned_duration": 30,
-                "planned_rpe": 4,
-                "notes_for_athlete": "Respirar nasal",
-            },
-            {
-                "date": (start + timedelta(days=2)).isoformat(),
-                "type": "PASADAS",
-                "title": "8x400",
-                "planned_distance": 10.0,
-                "planned_duration": 60,
-                "planned_rpe": 7,
-            },
-        ],
-    }
-
-    response = client.post(
+    body = _default_plan_body(athlete_id, start) if sessions is None else _plan_body(athlete_id, start, sessions)
+    response = await client.post(
         "/plans",
-        json=payload,
-        headers=auth_header(coach_token),
+        content=body,
+        headers={**auth_header(coach_token), "Content-Type": "application/json"},
     )
     assert response.status_code == 201, response.text
-    return response.json()
+    return orjson.loads(response.content)
 
 
-def test_coach_creates_plan_and_athlete_reads_it(client: TestClient):
-    athlete = register_user(client, "Athlete One", "athlete@example.com", "ATHLETE")
-    register_user(client, "Coach One", "coach@example.com", "COACH")
-
-    athlete_token = login(client, "athlete@example.com")
-    coach_token = login(client, "coach@example.com")
+async def test_coach_creates_plan_and_athlete_reads_it(client: AsyncClient, coach_athlete_pair):
+    athlete, athlete_token, coach_token, _ = coach_athlete_pair
 
     start = date(2024, 3, 11)
-    plan_data = create_plan_for_tests(client, coach_token, athlete["id"], start)
+    plan_data = await create_plan_for_tests(client, coach_token, athlete["id"], start)
     assert plan_data["name"] == "10K Base"
     assert len(plan_data["sessions"]) == 2
 
-    list_response = client.get(
+    list_response = await client.get(
         f"/plans/athlete/{athlete['id']}",
         headers=auth_header(athlete_token),
     )
@@ -94,44 +156,54 @@ def test_coach_creates_plan_and_athlete_reads_it(client: TestClient):
     assert plans[0]["sessions"][0]["title"] == "Easy Run"
 
 
-def test_refresh_and_invite_flow(client: TestClient):
-    athlete = register_user(client, "Invitee", "invitee@example.com", "ATHLETE")
-    coach = register_user(client, "Inviter", "inviter@example.com", "COACH")
-
-    athlete_token = login(client, "invitee@example.com")
-    coach_token = login(client, "inviter@example.com")
+async def test_refresh_and_invite_flow(client: AsyncClient, register_and_login):
+    athlete, athlete_token = await register_and_login("Invitee", "invitee@example.com", "ATHLETE")
+    coach, coach_token = await register_and_login("Inviter", "inviter@example.com", "COACH")
 
-    refresh_resp = client.post("/auth/refresh", headers=auth_header(athlete_token))
+    refresh_resp = await client.post("/auth/refresh", headers=auth_header(athlete_token))
     assert refresh_resp.status_code == 200
     assert "access_token" in refresh_resp.json()
 
-    invite_resp = client.post(
+    invite_resp = await post_json(
+        client,
         "/auth/invite-athlete",
-        json={"athlete_email": athlete["email"]},
+        payload={"athlete_email": athlete["email"]},
         headers=auth_header(coach_token),
     )
     assert invite_resp.status_code == 200
-    invite_again = client.post(
-        "/auth/invite-athlete",
-        json={"athlete_email": athlete["email"]},
-        headers=auth_header(coach_token),
-    )
-    assert invite_again.status_code == 200
 
-    forbidden_invite = client.post(
+    forbidden_invite = await post_json(
+        client,
         "/auth/invite-athlete",
-        json={"athlete_email": athlete["email"]},
+        payload={"athlete_email": athlete["email"]},
         headers=auth_header(athlete_token),
     )
     assert forbidden_invite.status_code == 403
 
 
-def test_athlete_cannot_duplicate_manual_session_same_day(client: TestClient):
-    register_user(client, "Runner", "runner@example.com", "ATHLETE")
-    token = login(client, "runner@example.com")
+async def test_invite_is_idempotent(client: AsyncClient, user_pool, db_session):
+    athlete = user_pool.take_athlete()
+    coach_token = user_pool.take_coach()["token"]
+
+    responses = [
+        await post_json(
+            client, "/auth/invite-athlete", {"athlete_email": athlete["email"]}, headers=auth_header(coach_token)
+        )
+        for _ in range(2)
+    ]
+    assert [r.status_code for r in responses] == [200, 200]
+    assert responses[0].json()["id"] == responses[1].json()["id"]
+    invites = db_session.scalar(
+        select(func.count()).select_from(CoachInvite).where(CoachInvite.athlete_id == athlete["id"])
+    )
+    assert invites == 1
+
+
+async def test_athlete_cannot_duplicate_manual_session_same_day(client: AsyncClient, user_pool):
+    token = user_pool.take_athlete()["token"]
 
     payload = {
-        "date": date(2024, 3, 15).isoformat(),
+        "date": date(2024, 3, 15),
         "actual_distance": 12.5,
         "actual_duration": 65,
         "actual_rpe": 6,
@@ -139,24 +211,21 @@ def test_athlete_cannot_duplicate_manual_session_same_day(client: TestClient):
         "shoes": "Pegasus",
         "notes": "Great run",
     }
-    first = client.post("/sessions/done", json=payload, headers=auth_header(token))
+    first = await post_json(client, "/sessions/done", payload, headers=auth_header(token))
     assert first.status_code == 201, first.text
 
-    duplicate = client.post("/sessions/done", json=payload, headers=auth_header(token))
-    assert duplicate.status_code == 400
+    duplicate = await post_json(client, "/sessions/done", payload, headers=auth_header(token))
+    assert duplicate.status_code == 409
     assert duplicate.json()["detail"] == "A session for this date already exists."
 
 
-def test_planned_session_logging_requires_ownership_and_unique(client: TestClient):
-    athlete_one = register_user(client, "Athlete 1", "ath1@example.com", "ATHLETE")
-    athlete_two = register_user(client, "Athlete 2", "ath2@example.com", "ATHLETE")
-    register_user(client, "Coach", "coach@team.com", "COACH")
-
-    token_one = login(client, "ath1@example.com")
-    token_two = login(client, "ath2@example.com")
-    coach_token = login(client, "coach@team.com")
+async def test_planned_session_logging_requires_ownership_and_unique(client: AsyncClient, user_pool):
+    athlete_one = user_pool.take_athlete()
+    token_one = athlete_one["token"]
+    token_two = user_pool.take_athlete()["token"]
+    coach_token = user_pool.take_coach()["token"]
 
-    plan = create_plan_for_tests(client, coach_token, athlete_one["id"], date(2024, 3, 18))
+    plan = await create_plan_for_tests(client, coach_token, athlete_one["id"], date(2024, 3, 18))
     planned_session_id = plan["sessions"][0]["id"]
 
     payload = {
@@ -166,54 +235,52 @@ def test_planned_session_logging_requires_ownership_and_unique(client: TestClien
         "actual_duration": 30,
     }
 
-    first = client.post("/sessions/done", json=payload, headers=auth_header(token_one))
+    first = await post_json(client, "/sessions/done", payload, headers=auth_header(token_one))
     assert first.status_code == 201, first.text
 
-    duplicate = client.post("/sessions/done", json=payload, headers=auth_header(token_one))
-    assert duplicate.status_code == 400
+    duplicate = await post_json(client, "/sessions/done", payload, headers=auth_header(token_one))
+    assert duplicate.status_code == 409
     assert duplicate.json()["detail"] == "You already logged this planned session."
 
-    forbidden = client.post("/sessions/done", json=payload, headers=auth_header(token_two))
+    forbidden = await post_json(client, "/sessions/done", payload, headers=auth_header(token_two))
     assert forbidden.status_code == 403
     assert forbidden.json()["detail"] == "Not your session."
 
 
-def test_coach_dashboard_metrics(client: TestClient):
-    athlete_one = register_user(client, "Ana Runner", "ana@example.com", "ATHLETE")
-    athlete_two = register_user(client, "Beto Runner", "beto@example.com", "ATHLETE")
-    register_user(client, "Coach Dash", "coachdash@example.com", "COACH")
-
-    token_one = login(client, "ana@example.com")
-    catchall_token = login(client, "beto@example.com")
-    coach_token = login(client, "coachdash@example.com")
+async def test_coach_dashboard_metrics(client: AsyncClient, user_pool):
+    athlete_one = user_pool.take_athlete()
+    athlete_two = user_pool.take_athlete()
+    token_one = athlete_one["token"]
+    catchall_token = athlete_two["token"]
+    coach_token = user_pool.take_coach()["token"]
 
     today = date.today()
     plan_sessions = [
         {
-            "date": today.isoformat(),
+            "date": today,
             "type": "RODAJE",
             "title": "Hoy",
             "planned_distance": 8,
         },
         {
-            "date": (today - timedelta(days=2)).isoformat(),
+            "date": today - timedelta(days=2),
             "type": "PASADAS",
             "title": "Series",
             "planned_distance": 6,
         },
     ]
-    plan = create_plan_for_tests(
+    plan = await create_plan_for_tests(
         client, coach_token, athlete_one["id"], today - timedelta(days=3), sessions=plan_sessions
     )
 
-    other_plan = create_plan_for_tests(
+    other_plan = await create_plan_for_tests(
         client,
         coach_token,
         athlete_two["id"],
         today - timedelta(days=10),
         sessions=[
             {
-                "date": (today - timedelta(days=10)).isoformat(),
+                "date": today - timedelta(days=10),
                 "type": "RODAJE",
                 "title": "Old",
                 "planned_distance": 5,
@@ -223,40 +290,41 @@ def test_coach_dashboard_metrics(client: TestClient):
     assert other_plan["athlete_id"] == athlete_two["id"]
 
     payload = {
-        "date": today.isoformat(),
+        "date": today,
         "planned_session_id": plan["sessions"][0]["id"],
         "actual_distance": 8.5,
         "actual_duration": 42,
     }
-    log_resp = client.post("/sessions/done", json=payload, headers=auth_header(token_one))
+    log_resp = await post_json(client, "/sessions/done", payload, headers=auth_header(token_one))
     assert log_resp.status_code == 201, log_resp.text
 
     # manual session outside plan for athlete two within week to test zero planned/completed
     manual_payload = {
-        "date": today.isoformat(),
+        "date": today,
         "actual_distance": 5,
         "actual_duration": 35,
     }
-    manual_resp = client.post("/sessions/done", json=manual_payload, headers=auth_header(catchall_token))
+    manual_resp = await post_json(client, "/sessions/done", payload=manual_payload, headers=auth_header(catchall_token))
     assert manual_resp.status_code == 201
 
-    dashboard_resp = client.get("/dashboard/coach/me", headers=auth_header(coach_token))
+    dashboard_resp = await client.get("/dashboard/coach/me", headers=auth_header(coach_token))
     assert dashboard_resp.status_code == 200, dashboard_resp.text
     data = dashboard_resp.json()
     assert len(data) == 2
-    ana_metrics = next(item for item in data if item["athlete_id"] == athlete_one["id"])
-    beto_metrics = next(item for item in data if item["athlete_id"] == athlete_two["id"])
+    by_id = {item["athlete_id"]: AthleteWeekMetrics(**item) for item in data}
+    ana_metrics = by_id[athlete_one["id"]]
+    beto_metrics = by_id[athlete_two["id"]]
 
-    assert ana_metrics["planned_sessions_week"] == 2
-    assert ana_metrics["completed_sessions_week"] == 1
-    assert ana_metrics["completed_distance_week"] == 8.5
-    assert ana_metrics["compliance_rate"] == 0.5
+    assert ana_metrics.planned_sessions_week == 2
+    assert ana_metrics.completed_sessions_week == 1
+    assert ana_metrics.completed_distance_week == 8.5
+    assert ana_metrics.compliance_rate == 0.5
 
-    assert beto_metrics["planned_sessions_week"] == 0
-    assert beto_metrics["completed_sessions_week"] == 1
-    assert beto_metrics["compliance_rate"] is None
+    assert beto_metrics.planned_sessions_week == 0
+    assert beto_metrics.completed_sessions_week == 1
+    assert beto_metrics.compliance_rate is None
 
-    overview_resp = client.get("/dashboard/coach/overview", headers=auth_header(coach_token))
+    overview_resp = await client.get("/dashboard/coach/overview", headers=auth_header(coach_token))
     assert overview_resp.status_code == 200, overview_resp.text
     overview = overview_resp.json()
     assert overview["total_athletes"] == 2
@@ -264,61 +332,83 @@ def test_coach_dashboard_metrics(client: TestClient):
     assert overview["low_compliance_athletes"] == 1
     assert len(overview["top_athletes"]) >= 1
     assert len(overview["trend"]) == 4
+    current_week, previous_week = overview["trend"][-1], overview["trend"][-2]
+    assert current_week["week_end"] == today.isoformat()
+    assert (current_week["planned_sessions"], current_week["completed_sessions"]) == (2, 2)
+    assert current_week["total_distance"] == 13.5
+    assert (previous_week["planned_sessions"], previous_week["completed_sessions"]) == (1, 0)
+    assert previous_week["compliance_rate"] == 0.0
+
+    delete_resp = await client.delete(f"/sessions/done/{log_resp.json()['id']}", headers=auth_header(token_one))
+    assert delete_resp.status_code == 204
+    refreshed = (await client.get("/dashboard/coach/me", headers=auth_header(coach_token))).json()
+    ana_metrics = {item["athlete_id"]: AthleteWeekMetrics(**item) for item in refreshed}[athlete_one["id"]]
+    assert ana_metrics.completed_sessions_week == 0
 
 
-def test_athlete_updates_and_deletes_session(client: TestClient):
-    athlete = register_user(client, "Updater", "update@example.com", "ATHLETE")
-    token = login(client, "update@example.com")
+async def test_athlete_updates_and_deletes_session(client: AsyncClient, user_pool):
+    token = user_pool.take_athlete()["token"]
 
     payload = {
-        "date": date(2024, 4, 2).isoformat(),
+        "date": date(2024, 4, 2),
         "actual_distance": 7,
         "actual_duration": 40,
         "actual_rpe": 6,
     }
-    response = client.post("/sessions/done", json=payload, headers=auth_header(token))
+    response = await post_json(client, "/sessions/done", payload, headers=auth_header(token))
     assert response.status_code == 201
     session_id = response.json()["id"]
 
+    listing = await client.get("/sessions/done/me", headers=auth_header(token))
+    etag = listing.headers["ETag"]
+    assert re.fullmatch(r'W/"[^" ]+"', etag)
+    detail = await client.get(f"/sessions/done/{session_id}", headers=auth_header(token))
+    assert re.fullmatch(r'W/"[^" ]+"', detail.headers["ETag"])
+    not_modified = await client.get("/sessions/done/me", headers={**auth_header(token), "If-None-Match": etag})
+    assert not_modified.status_code == 304
+
     update_payload = {
         "actual_distance": 10,
         "actual_rpe": 7,
         "notes": "Felt strong",
     }
-    update_resp = client.put(
+    update_resp = await client.put(
         f"/sessions/done/{session_id}", json=update_payload, headers=auth_header(token)
     )
     assert update_resp.status_code == 200, update_resp.text
     updated = update_resp.json()
     assert updated["actual_distance"] == 10
     assert updated["notes"] == "Felt strong"
+    changed = await client.get("/sessions/done/me", headers={**auth_header(token), "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
 
-    delete_resp = client.delete(f"/sessions/done/{session_id}", headers=auth_header(token))
+    delete_resp = await client.delete(f"/sessions/done/{session_id}", headers=auth_header(token))
     assert delete_resp.status_code == 204
 
-    list_resp = client.get("/sessions/done/me", headers=auth_header(token))
+    list_resp = await client.get("/sessions/done/me", headers=auth_header(token))
     assert list_resp.status_code == 200
     assert len(list_resp.json()) == 0
 
 
-def test_coach_filters_sessions_by_date_range(client: TestClient):
-    athlete = register_user(client, "Filter", "filter@example.com", "ATHLETE")
-    coach = register_user(client, "CoachFilter", "coachfilter@example.com", "COACH")
-    coach_token = login(client, "coachfilter@example.com")
-    athlete_token = login(client, "filter@example.com")
+async def test_coach_filters_sessions_by_date_range(client: AsyncClient, coach_athlete_pair, seed_sessions):
+    athlete, athlete_token, coach_token, _ = coach_athlete_pair
 
     # create link by plan creation
-    plan = create_plan_for_tests(client, coach_token, athlete["id"], date(2024, 1, 1))
-    payloads = [
-        {"date": date(2024, 1, 5).isoformat(), "actual_distance": 5},
-        {"date": date(2024, 1, 10).isoformat(), "actual_distance": 8},
-        {"date": date(2024, 2, 15).isoformat(), "actual_distance": 12},
-    ]
-    for payload in payloads:
-        resp = client.post("/sessions/done", json=payload, headers=auth_header(athlete_token))
-        assert resp.status_code == 201
+    plan = await create_plan_for_tests(client, coach_token, athlete["id"], date(2024, 1, 1))
+    resp = await post_json(
+        client,
+        "/sessions/done",
+        payload={"date": date(2024, 1, 10), "actual_distance": 8},
+        headers=auth_header(athlete_token),
+    )
+    assert resp.status_code == 201
+    seed_sessions(
+        athlete["id"],
+        [{"date": day, "actual_distance": distance} for day, distance in _FILTER_SEEDED_SESSIONS],
+    )
 
-    filter_resp = client.get(
+    filter_resp = await client.get(
         f"/sessions/done/athlete/{athlete['id']}",
         headers=auth_header(coach_token),
         params={"start_date": date(2024, 1, 6).isoformat(), "end_date": date(2024, 1, 31).isoformat()},
@@ -328,23 +418,40 @@ def test_coach_filters_sessions_by_date_range(client: TestClient):
     assert len(data) == 1
     assert data[0]["actual_distance"] == 8
 
+    first_page = await client.get("/sessions/done/me", headers=auth_header(athlete_token), params={"limit": 2})
+    assert [item["date"] for item in first_page.json()] == ["2024-02-15", "2024-01-10"]
+    revalidated = await client.get(
+        "/sessions/done/me",
+        headers={**auth_header(athlete_token), "If-None-Match": f'"stale", {first_page.headers["ETag"][2:]}'},
+        params={"limit": 2},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["X-Next-Before-Id"] == first_page.headers["X-Next-Before-Id"]
+    next_page = await client.get(
+        "/sessions/done/me",
+        headers=auth_header(athlete_token),
+        params={
+            "limit": 2,
+            "before": first_page.headers["X-Next-Before"],
+            "before_id": first_page.headers["X-Next-Before-Id"],
+        },
+    )
+    assert [item["date"] for item in next_page.json()] == ["2024-01-05"]
+    assert "X-Next-Before" not in next_page.headers
 
-def test_athlete_history_summary(client: TestClient):
-    athlete = register_user(client, "History Runner", "history@example.com", "ATHLETE")
-    coach = register_user(client, "History Coach", "historycoach@example.com", "COACH")
 
-    athlete_token = login(client, "history@example.com")
-    coach_token = login(client, "historycoach@example.com")
+async def test_athlete_history_summary(client: AsyncClient, coach_athlete_pair, seed_sessions):
+    athlete, athlete_token, coach_token, _ = coach_athlete_pair
 
     today = date.today()
-    plan = create_plan_for_tests(
+    plan = await create_plan_for_tests(
         client,
         coach_token,
         athlete["id"],
         today - timedelta(days=1),
         sessions=[
             {
-                "date": today.isoformat(),
+                "date": today,
                 "type": "RODAJE",
                 "title": "Tempo",
                 "planned_distance": 10,
@@ -353,48 +460,35 @@ def test_athlete_history_summary(client: TestClient):
     )
     planned_session_id = plan["sessions"][0]["id"]
 
-    def log(payload):
-        resp = client.post("/sessions/done", json=payload, headers=auth_header(athlete_token))
-        assert resp.status_code == 201, resp.text
-        return resp.json()
-
-    log(
-        {
-            "date": today.isoformat(),
+    resp = await post_json(
+        client,
+        "/sessions/done",
+        payload={
+            "date": today,
             "planned_session_id": planned_session_id,
             "actual_distance": 10,
             "actual_duration": 50,
             "actual_rpe": 7,
-        }
-    )
-    log(
-        {
-            "date": (today - timedelta(days=2)).isoformat(),
-            "actual_distance": 8,
-            "actual_duration": 45,
-            "actual_rpe": 6,
-        }
-    )
-    log(
-        {
-            "date": (today - timedelta(days=10)).isoformat(),
-            "actual_distance": 5,
-            "actual_duration": 30,
-            "actual_rpe": 5,
-        }
+        },
+        headers=auth_header(athlete_token),
     )
-    log(
-        {
-            "date": (today - timedelta(days=40)).isoformat(),
-            "actual_distance": 12,
-            "actual_duration": 60,
-            "actual_rpe": 6,
-        }
+    assert resp.status_code == 201, resp.text
+    seed_sessions(
+        athlete["id"],
+        [
+            {
+                "date": today - timedelta(days=days_ago),
+                "actual_distance": distance,
+                "actual_duration": duration,
+                "actual_rpe": rpe,
+            }
+            for days_ago, distance, duration, rpe in _HISTORY_MANUAL_SESSIONS
+        ],
     )
 
-    history_resp = client.get(f"/athletes/{athlete['id']}/history", headers=auth_header(athlete_token))
+    history_resp = await client.get(f"/athletes/{athlete['id']}/history", headers=auth_header(athlete_token))
     assert history_resp.status_code == 200, history_resp.text
-    data = history_resp.json()
+    data = orjson.loads(history_resp.content)
     assert data["week_sessions"] == 2
     assert data["week_total_distance"] == 18.0
     assert data["month_sessions"] == 3
@@ -404,5 +498,182 @@ def test_athlete_history_summary(client: TestClient):
     assert data["session_type_distribution"]["RODAJE"] == 1
     assert data["session_type_distribution"]["MANUAL"] == 2
 
-    history_coach = client.get(f"/athletes/{athlete['id']}/history", headers=auth_header(coach_token))
+    history_coach = await client.get(f"/athletes/{athlete['id']}/history", headers=auth_header(coach_token))
     assert history_coach.status_code == 200
+
+
+async def test_athlete_summary_totals(client: AsyncClient, user_pool, coach_athlete_pair):
+    athlete, athlete_token, coach_token, _ = coach_athlete_pair
+
+    plan = await create_plan_for_tests(client, coach_token, athlete["id"], date(2024, 5, 6))
+    await create_plan_for_tests(client, coach_token, athlete["id"], date(2024, 6, 3))
+    for payload in (
+        {"date": plan["sessions"][0]["date"], "planned_session_id": plan["sessions"][0]["id"], "actual_distance": 6},
+        {"date": date(2024, 5, 9), "actual_distance": 4.5},
+    ):
+        resp = await post_json(client, "/sessions/done", payload, headers=auth_header(athlete_token))
+        assert resp.status_code == 201, resp.text
+
+    summary_resp = await client.get(f"/athletes/{athlete['id']}/summary", headers=auth_header(coach_token))
+    assert summary_resp.status_code == 200, summary_resp.text
+    assert summary_resp.json() == {
+        "athlete_id": athlete["id"],
+        "total_plans": 2,
+        "planned_sessions": 4,
+        "completed_sessions": 2,
+        "total_distance_km": 10.5,
+    }
+
+    outsider_resp = await client.get(
+        f"/athletes/{athlete['id']}/summary", headers=auth_header(user_pool.take_athlete()["token"])
+    )
+    assert outsider_resp.status_code == 403
+
+
+async def test_athlete_weekly_stats_buckets(client: AsyncClient, user_pool, seed_sessions):
+    athlete = user_pool.take_athlete()
+    token = athlete["token"]
+
+    today = date.today()
+    resp = await post_json(
+        client,
+        "/sessions/done",
+        payload={"date": today, "actual_distance": 10, "actual_rpe": 6},
+        headers=auth_header(token),
+    )
+    assert resp.status_code == 201, resp.text
+    seed_sessions(
+        athlete["id"],
+        [
+            {"date": today - timedelta(days=offset), "actual_distance": distance, "actual_rpe": rpe}
+            for offset, distance, rpe in ((6, 4, 8), (7, 5, 5), (27, 3, 4), (28, 20, 9))
+        ],
+    )
+
+    stats_resp = await client.get(f"/athletes/{athlete['id']}/weekly-stats", headers=auth_header(token))
+    assert stats_resp.status_code == 200, stats_resp.text
+    stats = stats_resp.json()
+    assert [s["end_date"] for s in stats] == [
+        (today - timedelta(days=7 * offset)).isoformat() for offset in (3, 2, 1, 0)
+    ]
+    assert [s["sessions"] for s in stats] == [1, 0, 1, 2]
+    assert [s["total_distance"] for s in stats] == [3.0, 0.0, 5.0, 14.0]
+    assert stats[1]["avg_rpe"] is None
+    assert stats[3]["avg_rpe"] == 7.0
+
+
+async def test_athlete_today_overview_marks_completed(client: AsyncClient, coach_athlete_pair):
+    athlete, athlete_token, coach_token, _ = coach_athlete_pair
+
+    today = date.today()
+    plan = await create_plan_for_tests(client, coach_token, athlete["id"], today)
+    today_session = plan["sessions"][0]
+    resp = await post_json(
+        client,
+        "/sessions/done",
+        payload={"date": today_session["date"], "planned_session_id": today_session["id"], "actual_distance": 6},
+        headers=auth_header(athlete_token),
+    )
+    assert resp.status_code == 201, resp.text
+
+    overview_resp = await client.get(f"/athletes/{athlete['id']}/today", headers=auth_header(athlete_token))
+    assert overview_resp.status_code == 200, overview_resp.text
+    overview = overview_resp.json()
+    assert overview["today"]["session_id"] == today_session["id"]
+    assert overview["today"]["completed"] is True
+    assert overview["today"]["completed_session"]["id"] == resp.json()["id"]
+    assert [s["session_id"] for s in overview["upcoming"]] == [plan["sessions"][1]["id"]]
+    assert overview["upcoming"][0]["completed"] is False
+
+
+async def test_coach_reads_and_duplicates_plan(client: AsyncClient, user_pool):
+    athlete = user_pool.take_athlete()
+    target = user_pool.take_athlete()
+    coach_token = user_pool.take_coach()["token"]
+
+    plan = await create_plan_for_tests(client, coach_token, athlete["id"], date(2024, 3, 4))
+    target_plan = await create_plan_for_tests(client, coach_token, target["id"], date(2024, 1, 1))
+
+    read_resp = await client.get(f"/plans/{plan['id']}", headers=auth_header(coach_token))
+    assert read_resp.status_code == 200, read_resp.text
+    assert [s["id"] for s in read_resp.json()["sessions"]] == [s["id"] for s in plan["sessions"]]
+
+    duplicate_resp = await post_json(
+        client,
+        f"/plans/{plan['id']}/duplicate",
+        payload={"start_date": date(2024, 4, 1), "target_athlete_id": target["id"]},
+        headers=auth_header(coach_token),
+    )
+    assert duplicate_resp.status_code == 201, duplicate_resp.text
+    copy = duplicate_resp.json()
+    assert copy["athlete_id"] == target["id"]
+    assert copy["name"] == "10K Base Copy"
+    assert copy["end_date"] == date(2024, 5, 1).isoformat()
+    assert [s["date"] for s in copy["sessions"]] == [date(2024, 4, 1).isoformat(), date(2024, 4, 3).isoformat()]
+    assert {s["id"] for s in copy["sessions"]}.isdisjoint(s["id"] for s in plan["sessions"])
+
+    target_plans = await client.get(
+        f"/plans/athlete/{target['id']}", headers=auth_header(target["token"])
+    )
+    assert target_plans.status_code == 200
+    assert [p["id"] for p in target_plans.json()] == [copy["id"], target_plan["id"]]
+
+
+async def test_expired_or_invalid_token_is_rejected(client: AsyncClient):
+    user = await register_user(client, "Expired", "expired@example.com", "ATHLETE")
+    token = await login(client, "expired@example.com")
+    assert (await client.get("/auth/me", headers=auth_header(token))).status_code == 200
+
+    expired = create_access_token({"sub": str(user["id"]), "role": "ATHLETE"}, timedelta(seconds=-1))
+    assert (await client.get("/auth/me", headers=auth_header(expired))).status_code == 401
+    assert (await client.get("/auth/me", headers=auth_header(token + "x"))).status_code == 401
+
+
+def test_bulk_insert_external_activities_falls_back_to_executemany(user_pool, db_session):
+    athlete = user_pool.take_athlete()
+    received_at = datetime(2024, 3, 1, 6, 30)
+    rows = [
+        {"athlete_id": athlete["id"], "source": "garmin", "external_id": f"act-{n}", "payload": "{}"}
+        for n in range(COPY_THRESHOLD)
+    ]
+    rows[0]["received_at"] = received_at
+
+    bulk_insert_external_activities(db_session, [])
+    bulk_insert_external_activities(db_session, rows)
+    db_session.commit()
+
+    stored = db_session.scalars(
+        select(ExternalActivity).where(ExternalActivity.athlete_id == athlete["id"]).order_by(ExternalActivity.id)
+    ).all()
+    assert [a.external_id for a in stored] == [row["external_id"] for row in rows]
+    assert stored[0].received_at == received_at
+    assert all(a.received_at is not None for a in stored[1:])
+
+
+async def test_dashboard_compliance_rounds_half_to_even(client: AsyncClient, coach_athlete_pair, seed_sessions):
+    athlete, _, coach_token, _ = coach_athlete_pair
+    today = date.today()
+    plan = await create_plan_for_tests(
+        client,
+        coach_token,
+        athlete["id"],
+        today - timedelta(days=6),
+        sessions=[
+            {"date": today - timedelta(days=n % 7), "type": "RODAJE", "title": f"Run {n}"} for n in range(8)
+        ],
+    )
+    seed_sessions(athlete["id"], [{"date": today, "planned_session_id": plan["sessions"][0]["id"]}])
+
+    metrics = (await client.get("/dashboard/coach/me", headers=auth_header(coach_token))).json()
+    # 1/8 = 0.125 rounds half to even, matching the overview and trend rates.
+    assert metrics[0]["compliance_rate"] == 0.12
+    overview = (await client.get("/dashboard/coach/overview", headers=auth_header(coach_token))).json()
+    assert overview["avg_compliance_rate"] == 0.12
+    assert overview["trend"][-1]["compliance_rate"] == 0.12
+
+
+async def test_queue_logging_leaves_root_handlers_alone(client: AsyncClient):
+    # The session client keeps the app lifespan running; only the app's own
+    # logger is routed through the queue.
+    assert not any(isinstance(handler, QueueHandler) for handler in logging.getLogger().handlers)
+    assert any(isinstance(handler, QueueHandler) for handler in logging.getLogger("app").handlers)